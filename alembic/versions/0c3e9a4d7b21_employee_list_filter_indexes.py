@@ -0,0 +1,52 @@
+"""Employee list filter indexes
+
+Revision ID: 0c3e9a4d7b21
+Revises: f94cd78db393
+Create Date: 2026-10-19 10:03:18.774520
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0c3e9a4d7b21"
+down_revision: Union[str, None] = "f94cd78db393"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_employees_created_on", "employees", ["created_on"])
+    op.create_index(
+        "ix_employees_contract_type_created_on",
+        "employees",
+        ["contract_type", "created_on"],
+    )
+    op.create_index(
+        "ix_employees_gender_contract_type",
+        "employees",
+        ["gender", "contract_type"],
+    )
+    op.create_index(
+        "ix_employees_inactive_created_on",
+        "employees",
+        ["created_on"],
+        postgresql_where=sa.text("account_status = 'Inactive'"),
+    )
+    op.create_index(
+        "ix_employee_roles_role_employee_id",
+        "employee_roles",
+        ["role", "employee_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_employee_roles_role_employee_id", table_name="employee_roles")
+    op.drop_index("ix_employees_inactive_created_on", table_name="employees")
+    op.drop_index("ix_employees_gender_contract_type", table_name="employees")
+    op.drop_index("ix_employees_contract_type_created_on", table_name="employees")
+    op.drop_index("ix_employees_created_on", table_name="employees")
@@ -0,0 +1,39 @@
+"""Add token and name search indexes
+
+Revision ID: 3e8d2b6f9a15
+Revises: a7b3e1f04c62
+Create Date: 2026-10-19 13:41:07.218934
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3e8d2b6f9a15"
+down_revision: Union[str, None] = "a7b3e1f04c62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_accounts_activation_token", "accounts_activation", ["token"])
+    op.create_index("ix_reset_passwords_token", "reset_passwords", ["token"])
+    op.create_index("ix_blacklist_tokens_token", "blacklist_tokens", ["token"])
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_employees_full_name_trgm",
+        "employees",
+        [sa.text("lower(first_name || ' ' || last_name) gin_trgm_ops")],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_employees_full_name_trgm", table_name="employees")
+    op.drop_index("ix_blacklist_tokens_token", table_name="blacklist_tokens")
+    op.drop_index("ix_reset_passwords_token", table_name="reset_passwords")
+    op.drop_index("ix_accounts_activation_token", table_name="accounts_activation")
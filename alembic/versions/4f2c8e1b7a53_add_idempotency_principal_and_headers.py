@@ -0,0 +1,41 @@
+"""Add idempotency principal and response headers
+
+Revision ID: 4f2c8e1b7a53
+Revises: b8e4d2a61c97
+Create Date: 2026-10-20 09:47:05.118342
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f2c8e1b7a53"
+down_revision: Union[str, None] = "b8e4d2a61c97"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "idempotency_keys",
+        sa.Column("principal", sa.String(), server_default="", nullable=False),
+    )
+    op.add_column(
+        "idempotency_keys", sa.Column("response_headers", sa.JSON(), nullable=True)
+    )
+    op.drop_constraint("idempotency_keys_pkey", "idempotency_keys", type_="primary")
+    op.create_primary_key(
+        "idempotency_keys_pkey", "idempotency_keys", ["principal", "key", "route"]
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM idempotency_keys")
+    op.drop_constraint("idempotency_keys_pkey", "idempotency_keys", type_="primary")
+    op.create_primary_key("idempotency_keys_pkey", "idempotency_keys", ["key", "route"])
+    op.drop_column("idempotency_keys", "response_headers")
+    op.drop_column("idempotency_keys", "principal")
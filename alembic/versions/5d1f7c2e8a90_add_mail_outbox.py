@@ -0,0 +1,61 @@
+"""Add mail outbox
+
+Revision ID: 5d1f7c2e8a90
+Revises: 0c3e9a4d7b21
+Create Date: 2026-10-19 11:26:05.108347
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d1f7c2e8a90"
+down_revision: Union[str, None] = "0c3e9a4d7b21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("Pending", "Sent", "Failed", name="outboxstatus"),
+            server_default="Pending",
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column(
+            "available_on",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("sent_on", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column(
+            "created_on",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_outbox_pending_available_on",
+        "outbox",
+        ["available_on"],
+        postgresql_where=sa.text("status = 'Pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbox_pending_available_on", table_name="outbox")
+    op.drop_table("outbox")
+    op.execute("DROP TYPE outboxstatus")
@@ -0,0 +1,41 @@
+"""Add import states
+
+Revision ID: 7e3b9d1c5a26
+Revises: c5a9e3f28d14
+Create Date: 2026-10-20 14:12:37.480915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7e3b9d1c5a26"
+down_revision: Union[str, None] = "c5a9e3f28d14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "import_states",
+        sa.Column("import_id", sa.String(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("stage", sa.String(), nullable=False),
+        sa.Column("done", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_on",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("import_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("import_states")
@@ -0,0 +1,81 @@
+"""Add employee security version
+
+Revision ID: 9c4f1a7e2d68
+Revises: 3e8d2b6f9a15
+Create Date: 2026-10-19 14:27:45.603117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4f1a7e2d68"
+down_revision: Union[str, None] = "3e8d2b6f9a15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "employees",
+        sa.Column(
+            "security_version",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+    op.execute(
+        """
+        CREATE FUNCTION employees_bump_security_version() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.password IS DISTINCT FROM OLD.password
+                OR NEW.email IS DISTINCT FROM OLD.email
+                OR NEW.account_status IS DISTINCT FROM OLD.account_status THEN
+                NEW.security_version = OLD.security_version + 1;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER employees_bump_security_version
+        BEFORE UPDATE ON employees
+        FOR EACH ROW EXECUTE FUNCTION employees_bump_security_version()
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION employee_roles_touch_employee() RETURNS trigger AS $$
+        BEGIN
+            UPDATE employees
+            SET updated_on = clock_timestamp(), security_version = security_version + 1
+            WHERE id = COALESCE(NEW.employee_id, OLD.employee_id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION employee_roles_touch_employee() RETURNS trigger AS $$
+        BEGIN
+            UPDATE employees SET updated_on = clock_timestamp()
+            WHERE id = COALESCE(NEW.employee_id, OLD.employee_id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute("DROP TRIGGER employees_bump_security_version ON employees")
+    op.execute("DROP FUNCTION employees_bump_security_version()")
+    op.drop_column("employees", "security_version")
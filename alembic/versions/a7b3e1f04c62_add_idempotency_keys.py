@@ -0,0 +1,54 @@
+"""Add idempotency keys
+
+Revision ID: a7b3e1f04c62
+Revises: 5d1f7c2e8a90
+Create Date: 2026-10-19 13:02:51.336104
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7b3e1f04c62"
+down_revision: Union[str, None] = "5d1f7c2e8a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("route", sa.String(), nullable=False),
+        sa.Column("fingerprint", sa.String(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("InProgress", "Completed", name="idempotencystatus"),
+            server_default="InProgress",
+            nullable=False,
+        ),
+        sa.Column("response_status", sa.Integer(), nullable=True),
+        sa.Column("response_body", sa.LargeBinary(), nullable=True),
+        sa.Column("media_type", sa.String(), nullable=True),
+        sa.Column(
+            "created_on",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("expires_on", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("key", "route"),
+    )
+    op.create_index(
+        "ix_idempotency_keys_expires_on", "idempotency_keys", ["expires_on"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_idempotency_keys_expires_on", table_name="idempotency_keys")
+    op.drop_table("idempotency_keys")
+    op.execute("DROP TYPE idempotencystatus")
@@ -0,0 +1,50 @@
+"""Rework employee filter indexes
+
+Revision ID: b8e4d2a61c97
+Revises: e2a6c9d4f713
+Create Date: 2026-10-20 09:12:41.305718
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e4d2a61c97"
+down_revision: Union[str, None] = "e2a6c9d4f713"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_employees_gender_contract_type", table_name="employees")
+    op.drop_index("ix_employees_inactive_created_on", table_name="employees")
+    op.drop_index("ix_employee_roles_role_employee_id", table_name="employee_roles")
+    op.create_index(
+        "ix_employees_account_status_created_on",
+        "employees",
+        ["account_status", "created_on"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_employees_account_status_created_on", table_name="employees")
+    op.create_index(
+        "ix_employee_roles_role_employee_id",
+        "employee_roles",
+        ["role", "employee_id"],
+    )
+    op.create_index(
+        "ix_employees_inactive_created_on",
+        "employees",
+        ["created_on"],
+        postgresql_where=sa.text("account_status = 'Inactive'"),
+    )
+    op.create_index(
+        "ix_employees_gender_contract_type",
+        "employees",
+        ["gender", "contract_type"],
+    )
@@ -0,0 +1,139 @@
+"""Sync employee role names per statement
+
+Revision ID: c5a9e3f28d14
+Revises: 4f2c8e1b7a53
+Create Date: 2026-10-20 10:31:52.604219
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5a9e3f28d14"
+down_revision: Union[str, None] = "4f2c8e1b7a53"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("DROP TRIGGER employee_roles_touch_employee ON employee_roles")
+    op.execute("DROP FUNCTION employee_roles_touch_employee()")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION employees_bump_security_version() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.password IS DISTINCT FROM OLD.password
+                OR NEW.email IS DISTINCT FROM OLD.email
+                OR NEW.account_status IS DISTINCT FROM OLD.account_status
+                OR NEW.role_names IS DISTINCT FROM OLD.role_names THEN
+                NEW.security_version = OLD.security_version + 1;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION employee_roles_sync_employees() RETURNS trigger AS $$
+        DECLARE
+            ids integer[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(DISTINCT employee_id) INTO ids FROM new_roles;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT array_agg(DISTINCT employee_id) INTO ids FROM old_roles;
+            ELSE
+                SELECT array_agg(DISTINCT employee_id) INTO ids FROM (
+                    SELECT employee_id FROM new_roles
+                    UNION SELECT employee_id FROM old_roles
+                ) AS changed;
+            END IF;
+            UPDATE employees SET role_names = roles.role_names
+            FROM (
+                SELECT changed.id, ARRAY(
+                    SELECT role FROM employee_roles
+                    WHERE employee_roles.employee_id = changed.id ORDER BY role
+                ) AS role_names
+                FROM unnest(ids) AS changed(id)
+            ) AS roles
+            WHERE employees.id = roles.id
+                AND employees.role_names IS DISTINCT FROM roles.role_names;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER employee_roles_sync_insert
+        AFTER INSERT ON employee_roles
+        REFERENCING NEW TABLE AS new_roles
+        FOR EACH STATEMENT EXECUTE FUNCTION employee_roles_sync_employees()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER employee_roles_sync_update
+        AFTER UPDATE ON employee_roles
+        REFERENCING OLD TABLE AS old_roles NEW TABLE AS new_roles
+        FOR EACH STATEMENT EXECUTE FUNCTION employee_roles_sync_employees()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER employee_roles_sync_delete
+        AFTER DELETE ON employee_roles
+        REFERENCING OLD TABLE AS old_roles
+        FOR EACH STATEMENT EXECUTE FUNCTION employee_roles_sync_employees()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER employee_roles_sync_delete ON employee_roles")
+    op.execute("DROP TRIGGER employee_roles_sync_update ON employee_roles")
+    op.execute("DROP TRIGGER employee_roles_sync_insert ON employee_roles")
+    op.execute("DROP FUNCTION employee_roles_sync_employees()")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION employees_bump_security_version() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.password IS DISTINCT FROM OLD.password
+                OR NEW.email IS DISTINCT FROM OLD.email
+                OR NEW.account_status IS DISTINCT FROM OLD.account_status THEN
+                NEW.security_version = OLD.security_version + 1;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION employee_roles_touch_employee() RETURNS trigger AS $$
+        BEGIN
+            UPDATE employees
+            SET updated_on = clock_timestamp(),
+                security_version = security_version + 1,
+                role_names = ARRAY(
+                    SELECT role FROM employee_roles
+                    WHERE employee_roles.employee_id = employees.id ORDER BY role
+                )
+            WHERE id = COALESCE(NEW.employee_id, OLD.employee_id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER employee_roles_touch_employee
+        AFTER INSERT OR UPDATE OR DELETE ON employee_roles
+        FOR EACH ROW EXECUTE FUNCTION employee_roles_touch_employee()
+        """
+    )
@@ -0,0 +1,91 @@
+"""Add employee role names
+
+Revision ID: e2a6c9d4f713
+Revises: 9c4f1a7e2d68
+Create Date: 2026-10-19 15:08:12.447391
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a6c9d4f713"
+down_revision: Union[str, None] = "9c4f1a7e2d68"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "employees",
+        sa.Column(
+            "role_names",
+            postgresql.ARRAY(
+                postgresql.ENUM(
+                    "Admin",
+                    "InventoryManager",
+                    "SuperUser",
+                    "Vendor",
+                    name="role",
+                    create_type=False,
+                )
+            ),
+            server_default=sa.text("'{}'"),
+            nullable=False,
+        ),
+    )
+    op.execute("ALTER TABLE employees DISABLE TRIGGER employees_set_updated_on")
+    op.execute(
+        """
+        UPDATE employees SET role_names = ARRAY(
+            SELECT role FROM employee_roles
+            WHERE employee_roles.employee_id = employees.id ORDER BY role
+        )
+        """
+    )
+    op.execute("ALTER TABLE employees ENABLE TRIGGER employees_set_updated_on")
+    op.create_index(
+        "ix_employees_role_names",
+        "employees",
+        ["role_names"],
+        postgresql_using="gin",
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION employee_roles_touch_employee() RETURNS trigger AS $$
+        BEGIN
+            UPDATE employees
+            SET updated_on = clock_timestamp(),
+                security_version = security_version + 1,
+                role_names = ARRAY(
+                    SELECT role FROM employee_roles
+                    WHERE employee_roles.employee_id = employees.id ORDER BY role
+                )
+            WHERE id = COALESCE(NEW.employee_id, OLD.employee_id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION employee_roles_touch_employee() RETURNS trigger AS $$
+        BEGIN
+            UPDATE employees
+            SET updated_on = clock_timestamp(), security_version = security_version + 1
+            WHERE id = COALESCE(NEW.employee_id, OLD.employee_id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.drop_index("ix_employees_role_names", table_name="employees")
+    op.drop_column("employees", "role_names")
@@ -0,0 +1,77 @@
+"""Add employee updated_on for change feed
+
+Revision ID: f94cd78db393
+Revises: 22e5b4c91004
+Create Date: 2026-10-19 09:12:44.512093
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f94cd78db393"
+down_revision: Union[str, None] = "22e5b4c91004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "employees",
+        sa.Column(
+            "updated_on",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+    )
+    op.execute("UPDATE employees SET updated_on = COALESCE(created_on, now())")
+    op.create_index("ix_employees_updated_on_id", "employees", ["updated_on", "id"])
+    op.execute(
+        """
+        CREATE FUNCTION employees_set_updated_on() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_on = clock_timestamp();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER employees_set_updated_on
+        BEFORE UPDATE ON employees
+        FOR EACH ROW EXECUTE FUNCTION employees_set_updated_on()
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION employee_roles_touch_employee() RETURNS trigger AS $$
+        BEGIN
+            UPDATE employees SET updated_on = clock_timestamp()
+            WHERE id = COALESCE(NEW.employee_id, OLD.employee_id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER employee_roles_touch_employee
+        AFTER INSERT OR UPDATE OR DELETE ON employee_roles
+        FOR EACH ROW EXECUTE FUNCTION employee_roles_touch_employee()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER employee_roles_touch_employee ON employee_roles")
+    op.execute("DROP FUNCTION employee_roles_touch_employee()")
+    op.execute("DROP TRIGGER employees_set_updated_on ON employees")
+    op.execute("DROP FUNCTION employees_set_updated_on()")
+    op.drop_index("ix_employees_updated_on_id", table_name="employees")
+    op.drop_column("employees", "updated_on")
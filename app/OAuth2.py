@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 from app import schemas, models
 from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from app.utilities.cache import create_cache
+from app.utilities.tracing import traced
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -12,11 +14,17 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
+security_version_cache = create_cache(
+    "security_version", settings.EMPLOYEE_CACHE_SIZE, settings.EMPLOYEE_CACHE_TTL
+)
 
+
+@traced("bcrypt.hash")
 def hash_password(password: str):
     return pwd_context.hash(password)
 
 
+@traced("bcrypt.verify")
 def verify_password(pwd_plain: str, pwd_hashed: str):
     return pwd_context.verify(pwd_plain, pwd_hashed)
 
@@ -29,11 +37,26 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
+def create_employee_token(emp: models.Employee):
+    return create_access_token(
+        {
+            "user_id": emp.id,
+            "roles": [role.value for role in emp.role_names],
+            "account_status": emp.account_status.value,
+            "ver": emp.security_version,
+        }
+    )
+
+
 def verif_access_token(token: str, credentials_exception):
     try:
         payload = jwt.decode(token, SECRET_KEY, ALGORITHM)
-        id = payload.get("user_id")
-        token_data = schemas.TokenData(id=id)
+        token_data = schemas.TokenData(
+            id=payload.get("user_id"),
+            roles=payload.get("roles", []),
+            account_status=payload.get("account_status"),
+            version=payload.get("ver"),
+        )
         return token_data
     except ExpiredSignatureError:
         raise HTTPException(
@@ -43,12 +66,60 @@ def verif_access_token(token: str, credentials_exception):
         raise credentials_exception
 
 
-def get_current_employee(db, token):
-    credentials_exception = HTTPException(
+def get_credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail=f"Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def get_current_employee(db, token):
+    credentials_exception = get_credentials_exception()
     token_data = verif_access_token(token, credentials_exception)
-    emp = db.query(models.Employee).filter(models.Employee.id == token_data.id).first()
-    return emp
+    if token_data.version is None or token_data.version != get_security_version(
+        db, token_data.id
+    ):
+        raise credentials_exception
+    return Principal(token_data, db)
+
+
+def get_security_version(db, id: int):
+    cached = security_version_cache.get(str(id))
+    if cached is not None:
+        return int(cached)
+    version = (
+        db.query(models.Employee.security_version)
+        .filter(models.Employee.id == id)
+        .scalar()
+    )
+    if version is not None:
+        security_version_cache.set(str(id), str(version).encode())
+    return version
+
+
+class Principal:
+    def __init__(self, token_data: schemas.TokenData, db):
+        self.id = token_data.id
+        self.roles = token_data.roles
+        self.account_status = token_data.account_status
+        self.security_version = token_data.version
+        self._db = db
+        self._employee = None
+
+    @property
+    def employee(self):
+        if self._employee is None:
+            self._employee = (
+                self._db.query(models.Employee)
+                .filter(models.Employee.id == self.id)
+                .first()
+            )
+            if self._employee is None:
+                raise get_credentials_exception()
+        return self._employee
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.employee, name)
@@ -0,0 +1,597 @@
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple
+from fastapi import HTTPException
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.config import settings
+from app.database import engine
+from app.dependencies import PaginationParams
+from app.enums import (
+    AccountStatus,
+    ContractType,
+    Gender,
+    ImportMode,
+    Role,
+    TokenStatus,
+)
+from app.OAuth2 import (
+    create_access_token,
+    get_current_employee,
+    hash_password,
+    security_version_cache,
+)
+from app.services import auth, employee, upload_employee
+
+guarded_tables = {
+    "employees",
+    "employee_roles",
+    "accounts_activation",
+    "reset_passwords",
+    "blacklist_tokens",
+}
+skipped_statements = ("SAVEPOINT", "RELEASE", "ROLLBACK", "EXPLAIN")
+seed_prefix = "plan-check"
+seed_password = "Password1!"
+
+
+class Scenario(NamedTuple):
+    name: str
+    run: Callable
+    allow_seq_scan: frozenset = frozenset()
+    cost_budget: float = None
+    expected_indexes: frozenset = frozenset()
+    requires: str = None
+
+
+def seed(connection, count: int, password: str):
+    offset = connection.execute(
+        text("SELECT coalesce(max(number), 0) FROM employees")
+    ).scalar()
+    params = {
+        "offset": offset,
+        "count": count,
+        "prefix": seed_prefix,
+        "password": password,
+    }
+    connection.execute(
+        text("""
+            INSERT INTO employees (first_name, last_name, email, number, birth_date,
+                cnss_number, contract_type, gender, account_status, phone_number,
+                password, created_on, updated_on)
+            SELECT 'First' || i, 'Last' || i, :prefix || '-' || i || '@example.com',
+                :offset + i, date '1970-01-01' + i % 15000,
+                lpad((i % 100000000)::text, 8, '0') || '-' || lpad((i % 100)::text, 2, '0'),
+                (ARRAY['Cdi','Cdd','Sivp','Apprenti'])[1 + i % 4]::contracttype,
+                (ARRAY['Male','Female'])[1 + i % 2]::gender,
+                (CASE WHEN i % 10 = 0 THEN 'Inactive' ELSE 'Active' END)::accountstatus,
+                lpad((i % 100000000)::text, 8, '0'), :password,
+                now() - make_interval(mins => i), now() - make_interval(mins => i)
+            FROM generate_series(1, :count) AS i
+            """),
+        params,
+    )
+    connection.execute(
+        text("""
+            INSERT INTO employee_roles (employee_id, role)
+            SELECT id, (CASE WHEN number % 100 = 0 THEN 'Admin'
+                WHEN number % 10 = 0 THEN 'SuperUser'
+                WHEN number % 3 = 0 THEN 'InventoryManager'
+                ELSE 'Vendor' END)::role
+            FROM employees WHERE number > :offset
+            """),
+        params,
+    )
+    connection.execute(
+        text("""
+            INSERT INTO accounts_activation (employee_id, email, token, status)
+            SELECT id, email, md5(:prefix || id || 'activation'),
+                (CASE WHEN account_status = 'Inactive' THEN 'Pending' ELSE 'Used' END)::tokenstatus
+            FROM employees WHERE number > :offset
+            """),
+        params,
+    )
+    connection.execute(
+        text("""
+            INSERT INTO reset_passwords (employee_id, email, token, status)
+            SELECT id, email, md5(:prefix || id || 'reset'), 'Pending'::tokenstatus
+            FROM employees WHERE number > :offset AND number % 5 = 0
+            """),
+        params,
+    )
+    connection.execute(
+        text("""
+            INSERT INTO blacklist_tokens (token)
+            SELECT md5(:prefix || id || 'blacklist')
+            FROM employees WHERE number > :offset AND number % 20 = 0
+            """),
+        params,
+    )
+    connection.execute(
+        text(
+            "ANALYZE employees, employee_roles, accounts_activation, reset_passwords, blacklist_tokens"
+        )
+    )
+
+
+def vacuum():
+    # earlier runs roll their seed back, vacuum the dead rows so they do not skew plans
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"VACUUM {', '.join(sorted(guarded_tables))}"))
+
+
+def get_sample(connection, password: str = None):
+    emp = connection.execute(
+        select(
+            models.Employee.id,
+            models.Employee.email,
+            models.Employee.number,
+            models.Employee.last_name,
+            models.Employee.updated_on,
+            models.Employee.security_version,
+        )
+        .where(models.Employee.account_status == AccountStatus.Inactive)
+        .order_by(models.Employee.id.desc())
+        .limit(1)
+    ).first()
+    if emp is None:
+        return None
+    activation_token = connection.execute(
+        select(models.AccountActivation.token)
+        .where(models.AccountActivation.status == TokenStatus.Pending)
+        .order_by(models.AccountActivation.id.desc())
+        .limit(1)
+    ).scalar()
+    reset_token = connection.execute(
+        select(models.ResetPassword.token)
+        .where(models.ResetPassword.status == TokenStatus.Pending)
+        .order_by(models.ResetPassword.id.desc())
+        .limit(1)
+    ).scalar()
+    ids = connection.execute(
+        select(models.Employee.id).order_by(models.Employee.id.desc()).limit(50)
+    ).scalars()
+    return {
+        "employee": emp,
+        "ids": list(ids),
+        "activation_token": activation_token,
+        "reset_token": reset_token,
+        "recent": datetime.now() - timedelta(days=1),
+        "week_ago": datetime.now() - timedelta(days=7),
+        "password": password,
+    }
+
+
+def import_entry(sample: dict, mode: ImportMode):
+    start = 10**9 if mode == ImportMode.insert else sample["employee"].number - 49
+    numbers = [str(start + i) for i in range(50)]
+    return schemas.ColumnarUploadEntry(
+        columns={
+            "first_name": ["First"] * 50,
+            "last_name": [f"Last{number}" for number in numbers],
+            "email": [
+                f"{seed_prefix}-import-{number}@example.com" for number in numbers
+            ],
+            "number": numbers,
+            "gender": ["Male"] * 50,
+            "contract_type": [ContractType.Cdi.value] * 50,
+            "cnss_number": ["12345678-90"] * 50,
+            "employee_roles": [Role.Vendor.value] * 50,
+        },
+        rowIndex=list(range(1, 51)),
+        force_upload=True,
+        mode=mode,
+    )
+
+
+scenarios = [
+    Scenario(
+        "list employees",
+        lambda db, sample: employee.get_all(
+            db, PaginationParams(), employee.employee_out_fields
+        ),
+        allow_seq_scan=frozenset({"employees"}),
+        cost_budget=float("inf"),
+    ),
+    Scenario(
+        "search employees by name",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(name=sample["employee"].last_name),
+            employee.employee_out_fields,
+        ),
+    ),
+    Scenario(
+        "filter employees by gender",
+        lambda db, sample: employee.get_all(
+            db, PaginationParams(gender=Gender.Female), employee.employee_out_fields
+        ),
+        # half of the rows match, counting them reads the table either way
+        allow_seq_scan=frozenset({"employees"}),
+        cost_budget=float("inf"),
+    ),
+    Scenario(
+        "filter employees by contract type",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(contract_type=ContractType.Cdi),
+            employee.employee_out_fields,
+        ),
+        allow_seq_scan=frozenset({"employees"}),
+        cost_budget=float("inf"),
+    ),
+    Scenario(
+        "filter employees by gender and contract type",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(gender=Gender.Female, contract_type=ContractType.Cdi),
+            employee.employee_out_fields,
+        ),
+        allow_seq_scan=frozenset({"employees"}),
+        cost_budget=float("inf"),
+    ),
+    Scenario(
+        "filter employees by contract type and creation date",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(
+                contract_type=ContractType.Cdi,
+                created_from=sample["week_ago"],
+                created_to=sample["recent"],
+            ),
+            employee.employee_out_fields,
+        ),
+    ),
+    Scenario(
+        "filter employees with facets",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(
+                contract_type=ContractType.Cdi,
+                created_from=sample["recent"],
+                facets=True,
+            ),
+            employee.employee_out_fields,
+        ),
+    ),
+    Scenario(
+        "filter active employees",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(account_status=AccountStatus.Active),
+            employee.employee_out_fields,
+        ),
+        allow_seq_scan=frozenset({"employees"}),
+        cost_budget=float("inf"),
+    ),
+    Scenario(
+        "filter inactive employees",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(account_status=AccountStatus.Inactive),
+            employee.employee_out_fields,
+        ),
+        # a tenth of the rows match, spread over every page of the table
+        allow_seq_scan=frozenset({"employees"}),
+        cost_budget=float("inf"),
+    ),
+    Scenario(
+        "filter inactive employees by creation date",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(
+                account_status=AccountStatus.Inactive, created_from=sample["recent"]
+            ),
+            employee.employee_out_fields,
+        ),
+        expected_indexes=frozenset({"ix_employees_account_status_created_on"}),
+    ),
+    Scenario(
+        "filter employees by role",
+        lambda db, sample: employee.get_all(
+            db, PaginationParams(role=Role.Admin), employee.employee_out_fields
+        ),
+        expected_indexes=frozenset({"ix_employees_role_names"}),
+    ),
+    Scenario(
+        "filter employees by common role",
+        lambda db, sample: employee.get_all(
+            db, PaginationParams(role=Role.Vendor), employee.employee_out_fields
+        ),
+        allow_seq_scan=frozenset({"employees"}),
+        cost_budget=float("inf"),
+    ),
+    Scenario(
+        "filter employees by gender and role",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(gender=Gender.Male, role=Role.Admin),
+            employee.employee_out_fields,
+        ),
+        expected_indexes=frozenset({"ix_employees_role_names"}),
+    ),
+    Scenario(
+        "filter employees by role and creation date",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(role=Role.Admin, created_from=sample["recent"]),
+            employee.employee_out_fields,
+        ),
+    ),
+    Scenario(
+        "filter employees created since",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(created_from=sample["recent"]),
+            employee.employee_out_fields,
+        ),
+    ),
+    Scenario(
+        "filter employees by creation date range",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(
+                created_from=sample["week_ago"],
+                created_to=sample["week_ago"] + timedelta(days=1),
+            ),
+            employee.employee_out_fields,
+        ),
+    ),
+    Scenario(
+        "filter employees created before",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(created_to=sample["week_ago"]),
+            employee.employee_out_fields,
+        ),
+        allow_seq_scan=frozenset({"employees"}),
+        cost_budget=float("inf"),
+    ),
+    Scenario(
+        "filter employees by every field",
+        lambda db, sample: employee.get_all(
+            db,
+            PaginationParams(
+                gender=Gender.Male,
+                contract_type=ContractType.Cdi,
+                account_status=AccountStatus.Active,
+                role=Role.Vendor,
+                created_from=sample["week_ago"],
+                created_to=sample["recent"],
+            ),
+            employee.employee_out_fields,
+        ),
+    ),
+    Scenario("changes feed", lambda db, sample: employee.get_changes(db, None, 100)),
+    Scenario(
+        "changes feed from cursor",
+        lambda db, sample: employee.get_changes(
+            db,
+            employee.encode_cursor(
+                sample["employee"].updated_on, sample["employee"].id
+            ),
+            100,
+        ),
+    ),
+    Scenario(
+        "employee by id",
+        lambda db, sample: employee.get_employee_by_id(sample["employee"].id, db),
+    ),
+    Scenario(
+        "employee by email",
+        lambda db, sample: employee.get_employee_by_email(sample["employee"].email, db),
+    ),
+    Scenario(
+        "employee fields",
+        lambda db, sample: employee.get_employee_fields(
+            sample["employee"].id, db, employee.employee_out_fields
+        ),
+    ),
+    Scenario(
+        "employees batch",
+        lambda db, sample: employee.get_employees_by_ids(sample["ids"], db),
+    ),
+    Scenario(
+        "current employee",
+        lambda db, sample: get_current_employee(
+            db,
+            create_access_token(
+                {
+                    "user_id": sample["employee"].id,
+                    "ver": sample["employee"].security_version,
+                }
+            ),
+        ),
+    ),
+    Scenario(
+        "import employees",
+        lambda db, sample: upload_employee.upload_columnar(
+            import_entry(sample, ImportMode.insert), db
+        ),
+    ),
+    Scenario(
+        "upsert employees",
+        lambda db, sample: upload_employee.upload_columnar(
+            import_entry(sample, ImportMode.upsert), db
+        ),
+    ),
+    Scenario(
+        "edit employee",
+        lambda db, sample: employee.edit_employee(
+            sample["employee"].id,
+            schemas.EmployeeUpdate(
+                address="Tunis", actual_password=sample["password"]
+            ).model_dump(),
+            db,
+        ),
+        requires="password",
+    ),
+    Scenario(
+        "confirm account",
+        lambda db, sample: employee.confirmation_account(
+            sample["activation_token"], seed_password, db
+        ),
+        requires="activation_token",
+    ),
+    Scenario(
+        "create password",
+        lambda db, sample: auth.create_password(
+            sample["reset_token"], seed_password, db
+        ),
+        requires="reset_token",
+    ),
+]
+
+
+def walk_plan(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk_plan(child)
+
+
+def explain(connection, statement: str, parameters, analyze: bool = True):
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+    savepoint = connection.begin_nested()
+    try:
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN ({options}) {statement}", parameters
+        ).scalar()
+    except DBAPIError:
+        if not analyze:
+            raise
+        # replaying a write can collide with the row the scenario just wrote
+        savepoint.rollback()
+        return explain(connection, statement, parameters, analyze=False)
+    savepoint.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def check_plan(plan: dict, scenario: Scenario, cost_budget: float):
+    problems = []
+    for node in walk_plan(plan["Plan"]):
+        relation = node.get("Relation Name")
+        if (
+            node["Node Type"] == "Seq Scan"
+            and relation in guarded_tables
+            and relation not in scenario.allow_seq_scan
+        ):
+            problems.append(f"Seq Scan on {relation}")
+    budget = scenario.cost_budget or cost_budget
+    if plan["Plan"]["Total Cost"] > budget:
+        problems.append(f"cost {plan['Plan']['Total Cost']} over budget {budget}")
+    return problems
+
+
+def run_scenario(connection, scenario: Scenario, sample: dict, cost_budget: float):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(skipped_statements):
+            # insertmanyvalues batches arrive as one dict with executemany set
+            if executemany and isinstance(parameters, (list, tuple)):
+                parameters = parameters[0]
+            statements.append((statement, parameters))
+
+    employee.employee_cache.clear()
+    employee.count_cache.clear()
+    security_version_cache.clear()
+    problems = []
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        with Session(bind=connection, join_transaction_mode="create_savepoint") as db:
+            result = scenario.run(db, sample)
+        # read the instance dict, Principal loads the employee on unknown attributes
+        status_code = getattr(result, "__dict__", {}).get("status_code", 200)
+        if status_code >= 400:
+            problems.append(f"{scenario.name} answered {status_code}")
+    except HTTPException as http_error:
+        problems.append(
+            f"{scenario.name} answered {http_error.status_code}: {http_error.detail}"
+        )
+    except Exception as error:
+        problems.append(f"{scenario.name} raised {type(error).__name__}: {error}")
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+    if not statements:
+        problems.append(f"{scenario.name} ran no statements")
+    for problem in problems:
+        print(f"  FAIL {problem}")
+    used_indexes = set()
+    for statement, parameters in statements:
+        plan = explain(connection, statement, parameters)
+        used_indexes.update(
+            node["Index Name"]
+            for node in walk_plan(plan["Plan"])
+            if "Index Name" in node
+        )
+        statement_problems = check_plan(plan, scenario, cost_budget)
+        summary = " ".join(statement.split())[:100]
+        timing = (
+            f"{plan['Execution Time']:.2f}ms" if "Execution Time" in plan else "n/a"
+        )
+        print(
+            f"  {'FAIL' if statement_problems else 'ok  '} cost={plan['Plan']['Total Cost']:<10} "
+            f"time={timing} {summary}"
+        )
+        for problem in statement_problems:
+            print(f"       {problem}")
+        problems.extend(f"{problem} in {summary}" for problem in statement_problems)
+    for index in sorted(scenario.expected_indexes - used_indexes):
+        print(f"  FAIL {index} is not used by any statement")
+        problems.append(f"{index} is not used by any statement")
+    return problems
+
+
+def run_isolated(connection, scenario: Scenario, sample: dict, cost_budget: float):
+    # the services commit, which only releases their own savepoint inside this one
+    savepoint = connection.begin_nested()
+    try:
+        return run_scenario(connection, scenario, sample, cost_budget)
+    finally:
+        savepoint.rollback()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the service queries under EXPLAIN ANALYZE and fail on sequential scans or cost overruns"
+    )
+    parser.add_argument("--seed", type=int, default=settings.QUERY_PLAN_SEED_SIZE)
+    parser.add_argument(
+        "--cost-budget", type=float, default=settings.QUERY_PLAN_COST_BUDGET
+    )
+    args = parser.parse_args(argv)
+    engine.echo = False
+    failures = 0
+    if args.seed:
+        vacuum()
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            if args.seed:
+                seed(connection, args.seed, hash_password(seed_password))
+            sample = get_sample(connection, seed_password if args.seed else None)
+            if sample is None:
+                print("No inactive employee found, seed the database first")
+                return 1
+            for scenario in scenarios:
+                if scenario.requires and sample[scenario.requires] is None:
+                    print(f"{scenario.name} skipped, no {scenario.requires}")
+                    continue
+                print(scenario.name)
+                failures += len(
+                    run_isolated(connection, scenario, sample, args.cost_budget)
+                )
+        finally:
+            transaction.rollback()
+    print(f"{failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+import argparse
+import csv
+import io
+import json
+import random
+import sys
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from passlib.hash import bcrypt
+from sqlalchemy import text
+from app.database import engine
+from app.enums import AccountStatus, ContractType, Gender, Role, TokenStatus
+from app.services.upload_employee import possible_fields
+
+first_names = [
+    "Ahmed",
+    "Mohamed",
+    "Ali",
+    "Youssef",
+    "Omar",
+    "Karim",
+    "Sami",
+    "Walid",
+    "Amine",
+    "Hedi",
+    "Fatma",
+    "Amira",
+    "Sarra",
+    "Ines",
+    "Mariem",
+    "Nour",
+    "Yasmine",
+    "Rim",
+    "Salma",
+    "Olfa",
+]
+last_names = [
+    "Ben Ali",
+    "Trabelsi",
+    "Gharbi",
+    "Jebali",
+    "Hammami",
+    "Mejri",
+    "Ayari",
+    "Bouazizi",
+    "Chaabane",
+    "Dridi",
+    "Ferchichi",
+    "Khelifi",
+    "Mansouri",
+    "Sassi",
+    "Zouari",
+    "Abidi",
+    "Karoui",
+    "Baccouche",
+    "Masmoudi",
+    "Jaziri",
+]
+cities = [
+    "Tunis",
+    "Sfax",
+    "Sousse",
+    "Nabeul",
+    "Bizerte",
+    "Gabes",
+    "Ariana",
+    "Kairouan",
+    "Monastir",
+    "Gafsa",
+]
+contract_weights = {
+    ContractType.Cdi: 50,
+    ContractType.Cdd: 30,
+    ContractType.Sivp: 12,
+    ContractType.Apprenti: 8,
+}
+role_weights = {
+    Role.Vendor: 70,
+    Role.InventoryManager: 20,
+    Role.SuperUser: 8,
+    Role.Admin: 2,
+}
+error_texts = [
+    "Username and Password not accepted",
+    'duplicate key value violates unique constraint "employees_email_key"',
+    'duplicate key value violates unique constraint "employees_number_key"',
+    'new row for relation "employees" violates check constraint "ck_employees_cnss_number"',
+]
+corruptions = {
+    "first_name": lambda value: "",
+    "email": lambda value: value.replace("@", " at "),
+    "number": lambda value: f"-{value}",
+    "gender": lambda value: "Unknown",
+    "contract_type": lambda value: "Freelance",
+    "employee_roles": lambda value: "Manager",
+    "birth_date": lambda value: "31/12/1990",
+    "phone_number": lambda value: "12-34",
+    "cnss_number": lambda value: "1234",
+}
+employee_columns = [
+    "first_name",
+    "last_name",
+    "email",
+    "password",
+    "number",
+    "birth_date",
+    "address",
+    "cnss_number",
+    "contract_type",
+    "gender",
+    "account_status",
+    "phone_number",
+    "created_on",
+    "updated_on",
+    "role_names",
+]
+password_salt = "datasetgeneratorsaltxu"
+
+
+def generate_employee(seed: int, number: int, reference: datetime):
+    rng = random.Random(f"{seed}:{number}")
+    first_name = rng.choice(first_names)
+    last_name = rng.choice(last_names)
+    contract_type = rng.choices(
+        list(contract_weights), weights=list(contract_weights.values())
+    )[0]
+    cnss_number = None
+    if contract_type in [ContractType.Cdi, ContractType.Cdd] or rng.random() < 0.5:
+        cnss_number = f"{rng.randrange(10**8):08d}-{rng.randrange(100):02d}"
+    roles = {
+        rng.choices(list(role_weights), weights=list(role_weights.values()))[0]
+        for _ in range(1 + (rng.random() < 0.2))
+    }
+    created_on = reference - timedelta(seconds=rng.randrange(3 * 365 * 86400))
+    account_status = (
+        AccountStatus.Active if rng.random() < 0.85 else AccountStatus.Inactive
+    )
+    return {
+        "first_name": first_name,
+        "last_name": last_name,
+        "email": f"{first_name}.{last_name.replace(' ', '')}.{number}@example.com".lower(),
+        "number": number,
+        "birth_date": date(1965, 1, 1) + timedelta(days=rng.randrange(40 * 365)),
+        "address": f"{rng.randrange(1, 200)} Rue {rng.choice(last_names)}, {rng.choice(cities)}",
+        "cnss_number": cnss_number,
+        "contract_type": contract_type,
+        "gender": rng.choice(list(Gender)),
+        "account_status": account_status,
+        "phone_number": f"{rng.choice([2, 5, 9])}{rng.randrange(10**7):07d}",
+        "created_on": created_on,
+        "updated_on": created_on
+        + timedelta(
+            seconds=rng.randrange(int((reference - created_on).total_seconds()) + 1)
+        ),
+        "roles": sorted(roles, key=lambda role: role.value),
+        "activation_token": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "reset_token": (
+            str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            if rng.random() < 0.05
+            else None
+        ),
+        "blacklist_token": (
+            str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            if rng.random() < 0.02
+            else None
+        ),
+        "error": rng.choice(error_texts) if rng.random() < 0.01 else None,
+    }
+
+
+def copy_rows(cursor, table: str, columns: list, rows: list):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+    )
+
+
+def load_chunk(cursor, employees: list, password: str):
+    copy_rows(
+        cursor,
+        "employees",
+        employee_columns,
+        [
+            (
+                emp["first_name"],
+                emp["last_name"],
+                emp["email"],
+                password if emp["account_status"] == AccountStatus.Active else None,
+                emp["number"],
+                emp["birth_date"],
+                emp["address"],
+                emp["cnss_number"],
+                emp["contract_type"].value,
+                emp["gender"].value,
+                emp["account_status"].value,
+                emp["phone_number"],
+                emp["created_on"],
+                emp["updated_on"],
+                "{" + ",".join(role.value for role in emp["roles"]) + "}",
+            )
+            for emp in employees
+        ],
+    )
+    copy_rows(
+        cursor,
+        "dataset_roles",
+        ["number", "role"],
+        [(emp["number"], role.value) for emp in employees for role in emp["roles"]],
+    )
+    tokens = []
+    for emp in employees:
+        status = (
+            TokenStatus.Pending
+            if emp["account_status"] == AccountStatus.Inactive
+            else TokenStatus.Used
+        )
+        tokens.append(
+            ("activation", emp["number"], emp["activation_token"], status.value)
+        )
+        if emp["reset_token"]:
+            tokens.append(
+                ("reset", emp["number"], emp["reset_token"], TokenStatus.Pending.value)
+            )
+        if emp["blacklist_token"]:
+            tokens.append(("blacklist", emp["number"], emp["blacklist_token"], None))
+    copy_rows(cursor, "dataset_tokens", ["kind", "number", "token", "status"], tokens)
+    copy_rows(
+        cursor,
+        "dataset_errors",
+        ["number", "text", "created_on"],
+        [
+            (emp["number"], emp["error"], emp["updated_on"])
+            for emp in employees
+            if emp["error"]
+        ],
+    )
+
+
+def load_dataset(args, reference: datetime):
+    password = bcrypt.using(salt=password_salt).hash(args.password)
+    with engine.begin() as connection:
+        cursor = connection.connection.cursor()
+        connection.execute(
+            text(
+                "CREATE TEMP TABLE dataset_roles (number integer, role role) ON COMMIT DROP"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE TEMP TABLE dataset_tokens (kind text, number integer, token text, status tokenstatus) ON COMMIT DROP"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE TEMP TABLE dataset_errors (number integer, text text, created_on timestamptz) ON COMMIT DROP"
+            )
+        )
+        end = args.start_number + args.employees
+        for start in range(args.start_number, end, args.chunk_size):
+            employees = [
+                generate_employee(args.seed, number, reference)
+                for number in range(start, min(start + args.chunk_size, end))
+            ]
+            load_chunk(cursor, employees, password)
+            print(
+                f"copied {min(start + args.chunk_size, end) - args.start_number} employees"
+            )
+        connection.execute(
+            text(
+                "ALTER TABLE employee_roles DISABLE TRIGGER employee_roles_sync_insert"
+            )
+        )
+        connection.execute(text("""
+                INSERT INTO employee_roles (employee_id, role)
+                SELECT e.id, r.role FROM dataset_roles r JOIN employees e USING (number)
+                """))
+        connection.execute(
+            text("ALTER TABLE employee_roles ENABLE TRIGGER employee_roles_sync_insert")
+        )
+        for table, kind in [
+            ("accounts_activation", "activation"),
+            ("reset_passwords", "reset"),
+        ]:
+            connection.execute(
+                text(f"""
+                    INSERT INTO {table} (employee_id, email, token, status, created_on)
+                    SELECT e.id, e.email, t.token, t.status, e.updated_on
+                    FROM dataset_tokens t JOIN employees e USING (number)
+                    WHERE t.kind = :kind
+                    """),
+                {"kind": kind},
+            )
+        connection.execute(
+            text(
+                "INSERT INTO blacklist_tokens (token) SELECT token FROM dataset_tokens WHERE kind = 'blacklist'"
+            )
+        )
+        connection.execute(text("""
+                INSERT INTO errors (employee_id, text, created_on)
+                SELECT e.id, d.text, d.created_on
+                FROM dataset_errors d JOIN employees e USING (number)
+                """))
+    with engine.connect() as connection:
+        connection.execute(
+            text(
+                "ANALYZE employees, employee_roles, accounts_activation, reset_passwords, blacklist_tokens, errors"
+            )
+        )
+        connection.commit()
+
+
+def to_import_row(emp: dict):
+    return {
+        "first_name": emp["first_name"],
+        "last_name": emp["last_name"],
+        "email": emp["email"],
+        "number": str(emp["number"]),
+        "gender": emp["gender"].value,
+        "contract_type": emp["contract_type"].value,
+        "employee_roles": ",".join(role.value for role in emp["roles"]),
+        "birth_date": emp["birth_date"].isoformat(),
+        "address": emp["address"],
+        "phone_number": emp["phone_number"],
+        "cnss_number": emp["cnss_number"] or "",
+    }
+
+
+def generate_import_rows(args, reference: datetime):
+    rng = random.Random(f"{args.seed}:import")
+    start = args.start_number + args.employees
+    rows = []
+    for index in range(args.import_rows):
+        row = to_import_row(generate_employee(args.seed, start + index, reference))
+        if rng.random() < args.duplicate_ratio and (rows or args.employees):
+            if rows and (not args.employees or rng.random() < 0.5):
+                source = rng.choice(rows)
+            else:
+                number = args.start_number + rng.randrange(args.employees)
+                source = to_import_row(generate_employee(args.seed, number, reference))
+            field = rng.choice(["email", "number"])
+            row[field] = source[field]
+        if rng.random() < args.error_ratio:
+            field = rng.choice(list(corruptions))
+            row[field] = corruptions[field](row[field])
+        rows.append(row)
+    return rows
+
+
+def write_import_file(path: str, rows: list):
+    fields = list(possible_fields)
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(fields)
+            writer.writerows([[row[field] for field in fields] for row in rows])
+        print(f"mapping: {json.dumps({field: field for field in fields})}")
+        return
+    lines = [
+        {
+            field: {"colIndex": col_index, "rowIndex": row_index, "value": row[field]}
+            for col_index, field in enumerate(fields)
+        }
+        for row_index, row in enumerate(rows, start=1)
+    ]
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"lines": lines, "force_upload": False}, file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate a deterministic employees dataset and matching import files"
+    )
+    parser.add_argument("--employees", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--start-number", type=int, default=1)
+    parser.add_argument("--reference-date", default="2026-01-01")
+    parser.add_argument("--load", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--password", default="Password1!")
+    parser.add_argument("--import-rows", type=int, default=0)
+    parser.add_argument("--import-output")
+    parser.add_argument("--error-ratio", type=float, default=0.05)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.02)
+    args = parser.parse_args(argv)
+    if args.import_rows and not args.import_output:
+        parser.error("--import-output is required with --import-rows")
+    engine.echo = False
+    reference = datetime.fromisoformat(args.reference_date).replace(tzinfo=timezone.utc)
+    if args.load:
+        load_dataset(args, reference)
+    if args.import_rows:
+        write_import_file(args.import_output, generate_import_rows(args, reference))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
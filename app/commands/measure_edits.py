@@ -0,0 +1,127 @@
+import argparse
+import statistics
+import sys
+import time
+from sqlalchemy import event, text
+from app import schemas
+from app.commands import check_query_plans
+from app.database import SessionLocal, engine
+from app.OAuth2 import hash_password
+from app.services import employee
+
+seed_prefix = "edit-measure"
+
+
+def seed_employees(count: int):
+    with engine.begin() as connection:
+        check_query_plans.seed_prefix = seed_prefix
+        check_query_plans.seed(
+            connection, count, hash_password(check_query_plans.seed_password)
+        )
+        return (
+            connection.execute(
+                text("SELECT id FROM employees WHERE email LIKE :prefix ORDER BY id"),
+                {"prefix": f"{seed_prefix}-%"},
+            )
+            .scalars()
+            .all()
+        )
+
+
+def remove_employees():
+    with engine.begin() as connection:
+        connection.execute(
+            text("""
+                DELETE FROM blacklist_tokens WHERE token IN (
+                    SELECT md5(:seed_prefix || id || 'blacklist')
+                    FROM employees WHERE email LIKE :prefix
+                )
+                """),
+            {"seed_prefix": seed_prefix, "prefix": f"{seed_prefix}-%"},
+        )
+        connection.execute(
+            text("DELETE FROM employees WHERE email LIKE :prefix"),
+            {"prefix": f"{seed_prefix}-%"},
+        )
+
+
+def edit(id: int, address: str):
+    with SessionLocal() as db:
+        employee.edit_employee(
+            id,
+            schemas.EmployeeUpdate(
+                address=address, actual_password=check_query_plans.seed_password
+            ).model_dump(),
+            db,
+        )
+
+
+def measure(ids: list, warm_cache: bool):
+    database = {"seconds": 0.0, "statements": 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info["edit_measure_start"] = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        database["seconds"] += time.perf_counter() - conn.info.pop("edit_measure_start")
+        database["statements"] += 1
+
+    # the first write to each page after a checkpoint logs a full page image
+    for id in ids:
+        edit(id, "Warm up")
+    employee.employee_cache.clear()
+    if warm_cache:
+        with SessionLocal() as db:
+            for id in ids:
+                employee.get_employee_by_id(id, db)
+    with engine.connect() as connection:
+        start_lsn = connection.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+    latencies = []
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    try:
+        for id in ids:
+            if not warm_cache:
+                employee.employee_cache.clear()
+            start = time.perf_counter()
+            edit(id, f"Street {id}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", after_cursor_execute)
+    with engine.connect() as connection:
+        wal_bytes = connection.execute(
+            text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :lsn)"),
+            {"lsn": start_lsn},
+        ).scalar()
+    latencies.sort()
+    return {
+        "edits": len(ids),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "db_ms_per_edit": database["seconds"] * 1000 / len(ids),
+        "statements_per_edit": database["statements"] / len(ids),
+        "wal_bytes_per_edit": float(wal_bytes) / len(ids),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure employee edit latency and WAL volume on seeded employees"
+    )
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--warm-cache", action="store_true")
+    args = parser.parse_args(argv)
+    engine.echo = False
+    ids = seed_employees(args.edits)
+    try:
+        results = measure(ids, args.warm_cache)
+    finally:
+        remove_employees()
+    for name, value in results.items():
+        print(f"{name}: {value:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
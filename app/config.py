@@ -15,6 +15,50 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    EMPLOYEE_CACHE_SIZE: int = 1024
+    EMPLOYEE_CACHE_TTL: int = 300
+    CACHE_INVALIDATION_LISTENER: bool = True
+    CACHE_NOTIFY_MAX_IDS: int = 1000
+    OUTBOX_DISPATCHER: bool = True
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_POLL_SECONDS: float = 2
+    OUTBOX_LEASE_SECONDS: int = 300
+    OUTBOX_RETRY_SECONDS: int = 30
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    CHANGES_SAFETY_LAG_SECONDS: int = 60
+    UPLOAD_PROGRESS_INTERVAL: float = 0.5
+    IDEMPOTENCY_KEY_TTL: int = 86400
+    IDEMPOTENCY_WAIT_SECONDS: float = 30
+    IDEMPOTENCY_LEASE_SECONDS: int = 60
+    QUERY_PLAN_COST_BUDGET: float = 10000
+    QUERY_PLAN_SEED_SIZE: int = 100000
+    PROFILING_ENABLED: bool = False
+    PROFILING_ROUTES: list[str] = []
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_CAPTURES: int = 200
+    SQL_COUNTER_ENABLED: bool = True
+    SQL_REPEAT_THRESHOLD: int = 5
+    COUNT_CACHE_SIZE: int = 1024
+    COUNT_CACHE_TTL: int = 60
+    COUNT_ESTIMATE_THRESHOLD: int = 10000
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_ENCODINGS: list[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    UPLOAD_MAX_DECOMPRESSED_SIZE: int = 100 * 1024 * 1024
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 0.05
+    TRACING_SERVICE_NAME: str = "employee-management"
+    TRACING_EXPORTER: str = "file"
+    TRACING_FILE: str = "traces/spans.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_QUEUE_SIZE: int = 10000
+    TRACING_BATCH_SIZE: int = 512
+    TRACING_EXPORT_INTERVAL: float = 5
 
     model_config = SettingsConfigDict(env_file=".env")
 
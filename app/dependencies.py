@@ -1,9 +1,10 @@
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
 from typing import Annotated
+from datetime import datetime
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
-from app import models
-from app.OAuth2 import get_current_employee
+from app.enums import ContractType, Gender, AccountStatus, Role, CountMode
+from app.OAuth2 import get_current_employee, Principal
 from app.database import get_db
 from sqlalchemy.orm import Session
 
@@ -12,10 +13,31 @@ formDataDep = Annotated[OAuth2PasswordRequestForm, Depends()]
 
 
 class PaginationParams:
-    def __init__(self, name: str = None, page: int = 1, limit: int = 100):
+    def __init__(
+        self,
+        name: str = None,
+        page: int = 1,
+        limit: int = 100,
+        contract_type: ContractType = None,
+        gender: Gender = None,
+        account_status: AccountStatus = None,
+        role: Role = None,
+        created_from: datetime = None,
+        created_to: datetime = None,
+        facets: bool = False,
+        count: CountMode = CountMode.exact,
+    ):
         self.name = name
         self.page = page
         self.limit = limit
+        self.contract_type = contract_type
+        self.gender = gender
+        self.account_status = account_status
+        self.role = role
+        self.created_from = created_from
+        self.created_to = created_to
+        self.facets = facets
+        self.count = count
 
 
 pagination_params = Annotated[PaginationParams, Depends()]
@@ -28,4 +50,15 @@ def get_curr_emp(db: dbDep, token: tokenDep):
     return get_current_employee(db, token)
 
 
-currentEmployee = Annotated[models.Employee, Depends(get_curr_emp)]
+currentEmployee = Annotated[Principal, Depends(get_curr_emp)]
+
+
+def get_admin_emp(cur_emp: currentEmployee):
+    if Role.Admin not in cur_emp.roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required"
+        )
+    return cur_emp
+
+
+adminEmployee = Annotated[Principal, Depends(get_admin_emp)]
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class CountMode(Enum):
+    exact = "exact"
+    estimate = "estimate"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class IdempotencyStatus(Enum):
+    InProgress = "InProgress"
+    Completed = "Completed"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class ImportMode(Enum):
+    insert = "insert"
+    upsert = "upsert"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class ReportFormat(Enum):
+    full = "full"
+    compact = "compact"
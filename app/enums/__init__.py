@@ -6,3 +6,8 @@ from .Role import Role
 from .ConditionProperty import ConditionProperty
 from .FieldType import FieldType
 from .MatchyComparer import MatchyComparer
+from .ImportMode import ImportMode
+from .ReportFormat import ReportFormat
+from .OutboxStatus import OutboxStatus
+from .IdempotencyStatus import IdempotencyStatus
+from .CountMode import CountMode
@@ -1,13 +1,67 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import employee, auth, upload_employees
+from app.routers import employee, auth, upload_employees, profiling, metrics
 from fastapi.middleware.cors import CORSMiddleware
+from app.middlewares.compression import CompressionMiddleware
+from app.middlewares.decompression import DecompressionMiddleware
+from app.middlewares.idempotency import IdempotencyMiddleware
+from app.middlewares.profiling import ProfilingMiddleware
+from app.middlewares.query_counter import QueryCounterMiddleware
+from app.middlewares.tracing import TracingMiddleware
+from app.config import settings
+from app.database import engine
+from app.services.employee import employee_changed_channel, on_employee_changed
+from app.services.outbox import run_dispatcher
+from app.utilities.invalidation import InvalidationListener
+from app.utilities import profiling as request_profiling, query_counter, tracing
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.PROFILING_ENABLED:
+        request_profiling.instrument(app, engine)
+    span_processor = None
+    if settings.TRACING_ENABLED:
+        tracing.instrument(app, engine)
+        span_processor = tracing.SpanProcessor(tracing.create_exporter())
+        span_processor.start()
+    listener = None
+    if settings.CACHE_INVALIDATION_LISTENER:
+        listener = InvalidationListener(employee_changed_channel, on_employee_changed)
+        listener.start()
+    dispatcher = None
+    if settings.OUTBOX_DISPATCHER:
+        dispatcher = asyncio.create_task(run_dispatcher())
+    yield
+    if dispatcher is not None:
+        dispatcher.cancel()
+    if listener is not None:
+        listener.stop()
+    if span_processor is not None:
+        span_processor.stop()
+        span_processor.flush()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(router=employee.router)
 app.include_router(router=auth.router)
 app.include_router(router=upload_employees.router)
+app.include_router(router=profiling.router)
+app.include_router(router=metrics.router)
 
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(DecompressionMiddleware)
+if settings.SQL_COUNTER_ENABLED:
+    query_counter.instrument(engine)
+    app.add_middleware(QueryCounterMiddleware)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
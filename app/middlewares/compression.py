@@ -0,0 +1,89 @@
+from starlette.datastructures import Headers, MutableHeaders
+from app.config import settings
+from app.utilities.compression import choose_encoding, create_compressor
+
+excluded_content_types = ("text/event-stream",)
+compressible_content_types = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def is_compressible(content_type: str):
+    return content_type.startswith(compressible_content_types) and not (
+        content_type.startswith(excluded_content_types)
+    )
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await CompressionResponder(self.app, encoding)(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, app, encoding: str):
+        self.app = app
+        self.encoding = encoding
+        self.send = None
+        self.start_message = None
+        self.compressor = None
+        self.bypass = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.bypass:
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start_message = self.start_message
+            self.start_message = None
+            headers = MutableHeaders(raw=start_message["headers"])
+            if (
+                "content-encoding" in headers
+                or not is_compressible(headers.get("content-type", ""))
+                or (not more_body and len(body) < settings.COMPRESSION_MINIMUM_SIZE)
+            ):
+                self.bypass = True
+                await self.send(start_message)
+                await self.send(message)
+                return
+            self.compressor = create_compressor(self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["content-length"]
+                await self.send(start_message)
+            else:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self.send(start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+        body = self.compressor.compress(body)
+        if not more_body:
+            body += self.compressor.finish()
+        if body or not more_body:
+            await self.send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
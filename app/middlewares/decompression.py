@@ -0,0 +1,106 @@
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from app.config import settings
+from app.utilities.compression import (
+    DecompressionLimitExceeded,
+    create_decompressor,
+    decompressors,
+)
+
+decompressed_routes = {
+    ("POST", "/upload"),
+    ("POST", "/upload/columnar"),
+    ("POST", "/upload/file"),
+}
+
+
+class DecompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or (scope["method"], scope["path"]) not in decompressed_routes
+        ):
+            await self.app(scope, receive, send)
+            return
+        encoding = Headers(scope=scope).get("content-encoding", "").strip().lower()
+        if encoding in ("", "identity"):
+            await self.app(scope, receive, send)
+            return
+        if encoding not in decompressors:
+            response = JSONResponse(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                content={"detail": f"Unsupported Content-Encoding: {encoding}"},
+                headers={"Accept-Encoding": ", ".join(decompressors)},
+            )
+            await response(scope, receive, send)
+            return
+        await DecompressionResponder(self.app, encoding)(scope, receive, send)
+
+
+class DecompressionResponder:
+    def __init__(self, app, encoding: str):
+        self.app = app
+        self.decompressor = create_decompressor(
+            encoding, settings.UPLOAD_MAX_DECOMPRESSED_SIZE
+        )
+        self.receive = None
+        self.send = None
+        self.started = False
+        self.error = None
+
+    async def __call__(self, scope, receive, send):
+        self.receive = receive
+        self.send = send
+        app_scope = dict(scope)
+        app_scope["headers"] = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        try:
+            await self.app(
+                app_scope, self.receive_with_decompression, self.send_unless_failed
+            )
+        except Exception:
+            if self.error is None or self.started:
+                raise
+        if self.error is not None and not self.started:
+            response = JSONResponse(
+                status_code=self.error.status_code,
+                content={"detail": self.error.detail},
+            )
+            await response(scope, receive, send)
+
+    async def send_unless_failed(self, message):
+        if self.error is not None and not self.started:
+            return
+        if message["type"] == "http.response.start":
+            self.started = True
+        await self.send(message)
+
+    async def receive_with_decompression(self):
+        message = await self.receive()
+        if message["type"] != "http.request":
+            return message
+        more_body = message.get("more_body", False)
+        try:
+            body = self.decompressor.decompress(message.get("body", b""))
+            if not more_body:
+                self.decompressor.finish()
+        except DecompressionLimitExceeded:
+            self.error = HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Decompressed body exceeds {settings.UPLOAD_MAX_DECOMPRESSED_SIZE} bytes",
+            )
+            raise self.error
+        except Exception:
+            self.error = HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body could not be decompressed",
+            )
+            raise self.error
+        return {"type": "http.request", "body": body, "more_body": more_body}
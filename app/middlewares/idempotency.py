@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.config import settings
+from app.enums import IdempotencyStatus
+from app.OAuth2 import verif_access_token
+from app.services import idempotency
+
+idempotent_routes = {
+    ("POST", "/employee/"),
+    ("POST", "/upload"),
+    ("POST", "/upload/columnar"),
+    ("POST", "/upload/file"),
+}
+poll_interval = 0.2
+
+
+def get_principal(request: Request):
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return ""
+    try:
+        token_data = verif_access_token(token, HTTPException(status_code=401))
+    except HTTPException:
+        return ""
+    return "" if token_data.id is None else str(token_data.id)
+
+
+def replay(existing):
+    response = Response(
+        content=existing.response_body,
+        status_code=existing.response_status,
+        media_type=existing.media_type,
+    )
+    if existing.response_headers is not None:
+        response.raw_headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in existing.response_headers
+        ]
+    response.headers.append("Idempotent-Replayed", "true")
+    return response
+
+
+async def keep_claim(principal: str, key: str, route: str):
+    while True:
+        await asyncio.sleep(settings.IDEMPOTENCY_LEASE_SECONDS / 3)
+        await asyncio.to_thread(idempotency.extend_key, principal, key, route)
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        key = request.headers.get("Idempotency-Key")
+        route = request.url.path
+        if key is None or (request.method, route) not in idempotent_routes:
+            return await call_next(request)
+        principal = get_principal(request)
+        body = await request.body()
+        fingerprint = hashlib.sha256(
+            b"\n".join([request.method.encode(), str(request.url).encode(), body])
+        ).hexdigest()
+        claimed, existing = await asyncio.to_thread(
+            idempotency.claim_key, principal, key, route, fingerprint
+        )
+        waited = 0.0
+        while not claimed:
+            if existing is not None:
+                if existing.fingerprint != fingerprint:
+                    return JSONResponse(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        content={
+                            "detail": "Idempotency-Key already used with a different request"
+                        },
+                    )
+                if existing.status == IdempotencyStatus.Completed:
+                    return replay(existing)
+                if waited >= settings.IDEMPOTENCY_WAIT_SECONDS:
+                    return JSONResponse(
+                        status_code=status.HTTP_409_CONFLICT,
+                        content={
+                            "detail": "A request with this Idempotency-Key is in progress"
+                        },
+                    )
+                await asyncio.sleep(poll_interval)
+                waited += poll_interval
+            claimed, existing = await asyncio.to_thread(
+                idempotency.claim_key, principal, key, route, fingerprint
+            )
+        heartbeat = asyncio.create_task(keep_claim(principal, key, route))
+        try:
+            response = await call_next(request)
+            response_body = b"".join([chunk async for chunk in response.body_iterator])
+        except BaseException:
+            await asyncio.shield(
+                asyncio.to_thread(idempotency.release_key, principal, key, route)
+            )
+            raise
+        finally:
+            heartbeat.cancel()
+        headers = [
+            (name.decode("latin-1"), value.decode("latin-1"))
+            for name, value in response.raw_headers
+        ]
+        if response.status_code >= 500:
+            await asyncio.to_thread(idempotency.release_key, principal, key, route)
+        else:
+            await asyncio.to_thread(
+                idempotency.complete_key,
+                principal,
+                key,
+                route,
+                response.status_code,
+                response_body,
+                response.media_type or response.headers.get("content-type"),
+                headers,
+            )
+        buffered = Response(content=response_body, status_code=response.status_code)
+        buffered.raw_headers = response.raw_headers
+        return buffered
@@ -0,0 +1,46 @@
+import asyncio
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.config import settings
+from app.database import SessionLocal
+from app.enums import Role
+from app.OAuth2 import get_current_employee
+from app.utilities.profiling import Capture, current_capture
+
+
+def is_admin_token(authorization: str):
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    with SessionLocal() as db:
+        try:
+            principal = get_current_employee(db, token)
+        except Exception:
+            return False
+    return Role.Admin in principal.roles
+
+
+async def should_profile(request: Request):
+    if request.url.path in settings.PROFILING_ROUTES:
+        return True
+    if request.headers.get("X-Profile") is None:
+        return False
+    return await asyncio.to_thread(
+        is_admin_token, request.headers.get("Authorization", "")
+    )
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if not await should_profile(request):
+            return await call_next(request)
+        capture = Capture(request.method, request.url.path)
+        token = current_capture.set(capture)
+        try:
+            response = await call_next(request)
+        finally:
+            current_capture.reset(token)
+        capture.finish(response.status_code)
+        await asyncio.to_thread(capture.save)
+        response.headers["X-Profile-Id"] = capture.id
+        return response
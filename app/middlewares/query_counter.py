@@ -0,0 +1,17 @@
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.utilities.query_counter import QueryCounter, current_counter, record
+
+
+class QueryCounterMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        counter = QueryCounter()
+        token = current_counter.set(counter)
+        try:
+            response = await call_next(request)
+        finally:
+            current_counter.reset(token)
+        route = request.scope.get("route")
+        record(f"{request.method} {route.path if route else request.url.path}", counter)
+        response.headers.append("Server-Timing", counter.server_timing())
+        return response
@@ -0,0 +1,31 @@
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.utilities.tracing import current_span, start_trace
+
+
+class TracingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        span = start_trace(
+            f"{request.method} {request.url.path}",
+            request.headers.get("traceparent"),
+            **{"http.method": request.method, "http.target": request.url.path},
+        )
+        if span is None:
+            return await call_next(request)
+        span.kind = 2
+        token = current_span.set(span)
+        try:
+            response = await call_next(request)
+        except BaseException as error:
+            span.finish(error)
+            raise
+        finally:
+            current_span.reset(token)
+        route = request.scope.get("route")
+        if route is not None:
+            span.name = f"{request.method} {route.path}"
+            span.set_attribute("http.route", route.path)
+        span.set_attribute("http.status_code", response.status_code)
+        span.finish()
+        response.headers["X-Trace-Id"] = span.trace_id
+        return response
@@ -8,9 +8,12 @@ from sqlalchemy import (
     Enum,
     func,
     CheckConstraint,
+    Index,
+    text,
 )
-from app.enums import Gender, AccountStatus, ContractType
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import ARRAY, ENUM
+from app.enums import Gender, AccountStatus, ContractType, Role
+from sqlalchemy.orm import relationship, deferred
 
 
 class Employee(Base):
@@ -19,7 +22,7 @@ class Employee(Base):
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     email = Column(String, nullable=False, unique=True)
-    password = Column(String, nullable=True)
+    password = deferred(Column(String, nullable=True))
     number = Column(Integer, nullable=False, unique=True)
     birth_date = Column(DATE, nullable=True)
     address = Column(String, nullable=True)
@@ -33,10 +36,27 @@ class Employee(Base):
     )
     phone_number = Column(String, nullable=True)
     created_on = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    updated_on = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    security_version = Column(Integer, nullable=False, server_default=text("0"))
+    role_names = Column(
+        ARRAY(ENUM(Role, name="role", create_type=False)),
+        nullable=False,
+        server_default=text("'{}'"),
+    )
     __table_args__ = (
         CheckConstraint(
             "(contract_type IN ('Cdi','Cdd') AND cnss_number IS NOT NULL AND cnss_number ~ '^\\d{8}-\\d{2}$') OR (contract_type IN ('Apprenti','Sivp') AND (cnss_number is NULL OR  cnss_number ~ '^\\d{8}-\\d{2}$'))",
             name="ck_employees_cnss_number",
         ),
+        Index("ix_employees_updated_on_id", "updated_on", "id"),
+        Index("ix_employees_created_on", "created_on"),
+        Index("ix_employees_contract_type_created_on", "contract_type", "created_on"),
+        Index("ix_employees_account_status_created_on", "account_status", "created_on"),
+        Index("ix_employees_role_names", "role_names", postgresql_using="gin"),
+        Index(
+            "ix_employees_full_name_trgm",
+            text("lower(first_name || ' ' || last_name) gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
     )
     roles = relationship("EmployeeRole")
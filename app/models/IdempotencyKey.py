@@ -0,0 +1,33 @@
+from app.database import Base
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    TIMESTAMP,
+    Enum,
+    LargeBinary,
+    JSON,
+    func,
+    PrimaryKeyConstraint,
+)
+from app.enums import IdempotencyStatus
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    principal = Column(String, nullable=False, server_default="")
+    key = Column(String, nullable=False)
+    route = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)
+    status = Column(
+        Enum(IdempotencyStatus),
+        default=IdempotencyStatus.InProgress.value,
+        nullable=False,
+    )
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    media_type = Column(String, nullable=True)
+    response_headers = Column(JSON, nullable=True)
+    created_on = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    expires_on = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
+    __table_args__ = (PrimaryKeyConstraint("principal", "key", "route"),)
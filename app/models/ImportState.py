@@ -0,0 +1,14 @@
+from app.database import Base
+from sqlalchemy import Column, String, Integer, TIMESTAMP, func
+
+
+class ImportState(Base):
+    __tablename__ = "import_states"
+    import_id = Column(String, nullable=False, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    stage = Column(String, nullable=False)
+    done = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    updated_on = Column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
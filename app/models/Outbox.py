@@ -0,0 +1,34 @@
+from app.database import Base
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    TIMESTAMP,
+    Enum,
+    JSON,
+    func,
+    Index,
+    text,
+)
+from app.enums import OutboxStatus
+
+
+class Outbox(Base):
+    __tablename__ = "outbox"
+    id = Column(Integer, nullable=False, primary_key=True)
+    payload = Column(JSON, nullable=False)
+    status = Column(
+        Enum(OutboxStatus), default=OutboxStatus.Pending.value, nullable=False
+    )
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String, nullable=True)
+    available_on = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    sent_on = Column(TIMESTAMP(timezone=True), nullable=True)
+    created_on = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    __table_args__ = (
+        Index(
+            "ix_outbox_pending_available_on",
+            "available_on",
+            postgresql_where=text("status = 'Pending'"),
+        ),
+    )
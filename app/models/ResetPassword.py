@@ -10,6 +10,6 @@ class ResetPassword(Base):
         Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False
     )
     email = Column(String, nullable=False)
-    token = Column(String, nullable=False)
+    token = Column(String, nullable=False, index=True)
     status = Column(Enum(TokenStatus), default=TokenStatus.Pending.value)
     created_on = Column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -5,3 +5,6 @@ from .AccountActivation import AccountActivation
 from .BlacklistToken import BlacklistToken
 from app.database import Base
 from .Error import Error
+from .Outbox import Outbox
+from .IdempotencyKey import IdempotencyKey
+from .ImportState import ImportState
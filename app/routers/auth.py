@@ -21,8 +21,8 @@ def login(
 
 
 @router.post("/resetpswd")
-async def reset_pswd(email: schemas.ResetPassword, db: dbDep):
-    return await auth.reset_password(email.email, db)
+def reset_pswd(email: schemas.ResetPassword, db: dbDep):
+    return auth.reset_password(email.email, db)
 
 
 @router.patch("/createpswd")
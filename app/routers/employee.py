@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Response, Query
+from pydantic_core import to_json
 from app.services import employee
 from app import schemas
 from app.dependencies import dbDep, pagination_params, currentEmployee
@@ -7,28 +8,85 @@ router = APIRouter(prefix="/employee", tags=["Employee"])
 
 
 @router.get("/", response_model=schemas.EmployeesOut)
-def get_employees(db: dbDep, pg_params: pagination_params, cur_emp: currentEmployee):
+def get_employees(
+    db: dbDep,
+    pg_params: pagination_params,
+    cur_emp: currentEmployee,
+    fields: str = None,
+):
     try:
-        data = employee.get_all(db=db, pg_params=pg_params)
+        data = employee.get_all(
+            db=db, pg_params=pg_params, fields=employee.parse_fields(fields)
+        )
+    except HTTPException as http_error:
+        raise http_error
     except Exception as error:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(error)
         )
-    return schemas.EmployeesOut(
-        employees=[
-            employee.convert_employee_to_schema(emp) for emp in data["employees"]
-        ],
-        total_records=data["total_records"],
-        total_pages=data["total_pages"],
-        page_number=pg_params.page,
-        page_size=pg_params.limit,
+    return Response(
+        content=to_json(
+            {
+                "page_number": pg_params.page,
+                "page_size": pg_params.limit,
+                "total_pages": data["total_pages"],
+                "total_records": data["total_records"],
+                "total_records_approximate": data["total_records_approximate"],
+                "employees": data["employees"],
+                "facets": data["facets"],
+            }
+        ),
+        media_type="application/json",
     )
 
 
+@router.get("/changes", response_model=schemas.EmployeeChangesOut)
+def get_changes(
+    db: dbDep,
+    cur_emp: currentEmployee,
+    since: str = None,
+    limit: int = Query(default=500, ge=1, le=5000),
+):
+    try:
+        data = employee.get_changes(db=db, since=since, limit=limit)
+    except HTTPException as http_error:
+        raise http_error
+    except Exception as error:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(error)
+        )
+    return Response(content=to_json(data), media_type="application/json")
+
+
+@router.post("/batch", response_model=schemas.EmployeeBatchOut)
+def get_batch(
+    entry: schemas.EmployeeBatchRequest,
+    db: dbDep,
+    cur_emp: currentEmployee,
+    fields: str = None,
+):
+    try:
+        data = employee.get_employees_by_ids(
+            ids=entry.ids, db=db, fields=employee.parse_fields(fields)
+        )
+    except HTTPException as http_error:
+        raise http_error
+    except Exception as error:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(error)
+        )
+    return Response(content=to_json(data), media_type="application/json")
+
+
 @router.get("/{id}", response_model=schemas.EmployeeOut)
-def get_by_id(id: int, db: dbDep, cur_emp: currentEmployee):
+def get_by_id(id: int, db: dbDep, cur_emp: currentEmployee, fields: str = None):
     try:
-        emp = employee.get_employee_by_id(id=id, db=db)
+        if fields is None:
+            emp = employee.get_employee_by_id(id=id, db=db)
+        else:
+            emp = employee.get_employee_fields(
+                id=id, db=db, fields=employee.parse_fields(fields)
+            )
         if emp is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found"
@@ -39,15 +97,17 @@ def get_by_id(id: int, db: dbDep, cur_emp: currentEmployee):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(error)
         )
+    if fields is not None:
+        return Response(content=to_json(emp), media_type="application/json")
     return employee.convert_employee_to_schema(emp)
 
 
 @router.post(
     "/", status_code=status.HTTP_201_CREATED, response_model=schemas.EmployeeOut
 )
-async def create_employee(emp: schemas.EmployeeCreate, db: dbDep):
+def create_employee(emp: schemas.EmployeeCreate, db: dbDep):
     try:
-        new_emp = await employee.create_employee(emp.model_dump(), db)
+        new_emp = employee.create_employee(emp.model_dump(), db)
     except HTTPException as http_error:
         raise http_error
     except Exception as error:
@@ -58,7 +118,7 @@ async def create_employee(emp: schemas.EmployeeCreate, db: dbDep):
 
 
 @router.put("/{id}", response_model=schemas.EmployeeOut)
-async def update_employee(
+def update_employee(
     update_data: schemas.EmployeeUpdate, id: int, db: dbDep, cur_emp: currentEmployee
 ):
     try:
@@ -66,16 +126,14 @@ async def update_employee(
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Password must be match"
             )
-        employee_updated = await employee.edit_employee(
-            id, update_data.model_dump(), db
-        )
+        employee_updated = employee.edit_employee(id, update_data.model_dump(), db)
     except HTTPException as http_error:
         raise http_error
     except Exception as error:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(error)
         )
-    return employee.convert_employee_to_schema(employee_updated)
+    return Response(content=to_json(employee_updated), media_type="application/json")
 
 
 @router.patch("/")
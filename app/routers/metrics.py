@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from app.dependencies import adminEmployee
+from app.utilities.query_counter import get_route_metrics
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/sql")
+def get_sql_metrics(admin: adminEmployee):
+    return get_route_metrics()
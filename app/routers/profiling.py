@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from app.dependencies import adminEmployee
+from app.services import profiling
+
+router = APIRouter(prefix="/profiling", tags=["Profiling"])
+
+
+@router.get("/captures")
+def get_captures(admin: adminEmployee):
+    return profiling.list_captures()
+
+
+@router.get("/captures/{id}")
+def get_capture(id: str, admin: adminEmployee):
+    return profiling.get_capture(id)
+
+
+@router.get("/captures/{id}/profile")
+def download_profile(id: str, admin: adminEmployee):
+    return profiling.download_profile(id)
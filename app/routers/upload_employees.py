@@ -1,7 +1,10 @@
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, UploadFile, Form
+from fastapi.responses import StreamingResponse
 from app.dependencies import dbDep
 from app.services import upload_employee
 from app import schemas
+from app.enums import ImportMode, ReportFormat
+from app.utilities.progress import stream_progress
 
 router = APIRouter()
 
@@ -12,5 +15,37 @@ def get_fields():
 
 
 @router.post("/upload")
-def upload_employees(entry: schemas.UploadEntry, bg_tasks: BackgroundTasks, db: dbDep):
-    return upload_employee.upload(entry, bg_tasks, db)
+def upload_employees(entry: schemas.UploadEntry, db: dbDep):
+    return upload_employee.upload(entry, db)
+
+
+@router.post("/upload/columnar")
+def upload_employees_columnar(entry: schemas.ColumnarUploadEntry, db: dbDep):
+    return upload_employee.upload_columnar(entry, db)
+
+
+@router.post("/upload/file")
+def upload_employees_file(
+    file: UploadFile,
+    db: dbDep,
+    mapping: str = Form(...),
+    force_upload: bool = Form(False),
+    mode: ImportMode = Form(ImportMode.insert),
+    report_format: ReportFormat = Form(ReportFormat.full),
+    import_id: str = Form(None),
+):
+    return upload_employee.upload_file(
+        file.file,
+        file.filename,
+        mapping,
+        force_upload,
+        mode,
+        report_format,
+        db,
+        import_id,
+    )
+
+
+@router.get("/upload/progress/{import_id}")
+def upload_progress(import_id: str):
+    return StreamingResponse(stream_progress(import_id), media_type="text/event-stream")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from datetime import date, datetime
 from app.enums import (
     Gender,
@@ -8,6 +8,8 @@ from app.enums import (
     FieldType,
     MatchyComparer,
     ConditionProperty,
+    ImportMode,
+    ReportFormat,
 )
 from typing import List, Dict, Any, Optional
 
@@ -67,10 +69,47 @@ class EmployeeOut(EmployeeBase):
     id: int
     account_status: AccountStatus
     created_on: datetime
+    updated_on: datetime | None = None
+
+
+class CachedEmployee(OurBaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    number: int
+    birth_date: date | None = None
+    address: str | None = None
+    cnss_number: str | None = None
+    contract_type: ContractType
+    gender: Gender
+    account_status: AccountStatus
+    phone_number: str | None = None
+    created_on: datetime | None = None
+    updated_on: datetime | None = None
+    security_version: int
+    role_names: List[Role] = []
 
 
 class EmployeesOut(PagedResponse):
     employees: List[EmployeeOut]
+    total_records_approximate: bool = False
+    facets: Dict[str, Dict[str, int]] | None = None
+
+
+class EmployeeBatchRequest(OurBaseModel):
+    ids: List[int] = Field(min_length=1, max_length=500)
+
+
+class EmployeeBatchOut(OurBaseModel):
+    employees: List[EmployeeOut]
+    missing_ids: List[int]
+
+
+class EmployeeChangesOut(OurBaseModel):
+    employees: List[EmployeeOut]
+    next_cursor: str | None = None
+    has_more: bool
 
 
 class ResetPassword(OurBaseModel):
@@ -84,6 +123,9 @@ class Token(OurBaseModel):
 
 class TokenData(OurBaseModel):
     id: int
+    roles: List[Role] = []
+    account_status: AccountStatus | None = None
+    version: int | None = None
 
 
 class MailData(OurBaseModel):
@@ -130,6 +172,26 @@ class MatchyCell(OurBaseModel):
 class UploadEntry(OurBaseModel):
     lines: List[Dict[str, MatchyCell]]
     force_upload: Optional[bool] = False
+    mode: Optional[ImportMode] = ImportMode.insert
+    report_format: Optional[ReportFormat] = ReportFormat.full
+    import_id: Optional[str] = None
+
+
+class ColumnarUploadEntry(OurBaseModel):
+    columns: Dict[str, List[str]]
+    rowIndex: List[int]
+    colIndex: Dict[str, int] = {}
+    force_upload: Optional[bool] = False
+    mode: Optional[ImportMode] = ImportMode.insert
+    report_format: Optional[ReportFormat] = ReportFormat.full
+    import_id: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_columns_length(self):
+        for field, values in self.columns.items():
+            if len(values) != len(self.rowIndex):
+                raise ValueError(f"Column {field} should have one value per row")
+        return self
 
 
 class MatchyWrongCell(OurBaseModel):
@@ -138,7 +200,27 @@ class MatchyWrongCell(OurBaseModel):
     colIndex: int
 
 
+class MatchyCompactReport(OurBaseModel):
+    messages: List[str] = []
+    errorLines: List[Optional[int]] = []
+    errorMessageIds: List[int] = []
+    warningLines: List[Optional[int]] = []
+    warningMessageIds: List[int] = []
+    rowIndex: List[int] = []
+    colIndex: List[int] = []
+    messageId: List[int] = []
+    countsByField: Dict[str, int] = {}
+
+
+class ImportSummary(OurBaseModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+
 class ImportResponse(BaseOut):
     errors: Optional[str] = None
     warnings: Optional[str] = None
     wrongCells: Optional[List[MatchyWrongCell]] = None
+    compactReport: Optional[MatchyCompactReport] = None
+    summary: Optional[ImportSummary] = None
@@ -6,11 +6,13 @@ from fastapi import status, HTTPException
 from sqlalchemy.orm import Session
 from app.services import employee
 from app import models, schemas
-from app.OAuth2 import verify_password, create_access_token, hash_password
+from app.OAuth2 import verify_password, create_employee_token, hash_password
 from app.services.error import add_error
-from app.utilities import send_mail
+from app.services.outbox import enqueue_mail
+from app.utilities.tracing import traced
 
 
+@traced()
 def login(employee_credentials: dict, db: Session):
     try:
         emp = employee.get_employee_by_email(employee_credentials["email"], db)
@@ -27,7 +29,7 @@ def login(employee_credentials: dict, db: Session):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Wrong password"
             )
-        access_token = create_access_token({"user_id": emp.id})
+        access_token = create_employee_token(emp)
         return schemas.Token(access_token=access_token, token_type="Bearer")
     except HTTPException as http_error:
         raise http_error
@@ -35,7 +37,8 @@ def login(employee_credentials: dict, db: Session):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
 
 
-async def reset_password(email: str, db: Session):
+@traced()
+def reset_password(email: str, db: Session):
     try:
         emp = employee.get_employee_by_email(email, db)
         if emp is None:
@@ -50,16 +53,17 @@ async def reset_password(email: str, db: Session):
         )
         db.add(new_token)
         db.flush()
-        await send_mail(
+        enqueue_mail(
+            db,
             schemas.MailData(
                 emails=[emp.email],
                 body={
                     "name": f"{emp.first_name} {emp.last_name}",
-                    "token": new_token.token,
+                    "token": str(new_token.token),
                 },
                 template="reset_password.html",
                 subject="Reset Password",
-            )
+            ),
         )
         db.commit()
         return JSONResponse(
@@ -74,6 +78,7 @@ async def reset_password(email: str, db: Session):
         )
 
 
+@traced()
 def create_password(code: str, password: str, db: Session):
     try:
         code_db = (
@@ -112,7 +117,9 @@ def create_password(code: str, password: str, db: Session):
                 detail="Reset password failed try again",
             )
         code_db.status = TokenStatus.Used
+        employee.notify_employee_changed(db, emp_db.id)
         db.commit()
+        employee.invalidate_employee_cache(emp_db.id)
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={"message": "Reset password successfully"},
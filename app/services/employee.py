@@ -1,15 +1,31 @@
+import base64
+import hashlib
 import uuid
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy import String, func, literal_column, text, tuple_, update
+from sqlalchemy.orm import Session, make_transient_to_detached, undefer
 from app import models, schemas
-from app.OAuth2 import hash_password, verify_password
-from app.utilities import send_mail
-from app.enums import AccountStatus, TokenStatus
+from app.OAuth2 import hash_password, verify_password, security_version_cache
+from app.services.outbox import enqueue_mail
+from app.utilities.cache import create_cache
+from app.utilities.explain import Explain
+from app.utilities.invalidation import notify, parse_id_ranges, EPOCH
+from app.utilities.tracing import traced
+from app.enums import AccountStatus, TokenStatus, CountMode, Role
 from fastapi import HTTPException, status
 from .error import get_error_detail, add_error
 from fastapi.responses import JSONResponse
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.dependencies import PaginationParams
+from app.config import settings
+
+employee_cache = create_cache(
+    "employee", settings.EMPLOYEE_CACHE_SIZE, settings.EMPLOYEE_CACHE_TTL
+)
+count_cache = create_cache(
+    "employee_count", settings.COUNT_CACHE_SIZE, settings.COUNT_CACHE_TTL
+)
+employee_changed_channel = "employee_changed"
 
 error_keys = {
     "ck_employees_cnss_number": {
@@ -43,12 +59,85 @@ def convert_employee_to_schema(employee: models.Employee):
         contract_type=employee.contract_type,
         gender=employee.gender,
         phone_number=str(employee.phone_number),
-        roles=[employee_role.role for employee_role in employee.roles],
+        roles=employee.role_names,
         account_status=employee.account_status,
         created_on=employee.created_on,
+        updated_on=employee.updated_on,
     )
 
 
+employee_out_columns = (
+    models.Employee.id,
+    models.Employee.first_name,
+    models.Employee.last_name,
+    models.Employee.email,
+    models.Employee.number,
+    models.Employee.birth_date,
+    models.Employee.address,
+    models.Employee.cnss_number,
+    models.Employee.contract_type,
+    models.Employee.gender,
+    models.Employee.phone_number,
+    models.Employee.account_status,
+    models.Employee.created_on,
+    models.Employee.updated_on,
+    models.Employee.role_names,
+)
+
+
+employee_out_fields = [
+    "first_name",
+    "last_name",
+    "email",
+    "number",
+    "birth_date",
+    "address",
+    "cnss_number",
+    "contract_type",
+    "gender",
+    "phone_number",
+    "roles",
+    "id",
+    "account_status",
+    "created_on",
+    "updated_on",
+]
+
+
+def parse_fields(fields: str | None):
+    if fields is None:
+        return employee_out_fields
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = set(requested) - set(employee_out_fields)
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields : {(', ').join(sorted(unknown))}",
+        )
+    return requested
+
+
+def get_fields_columns(fields: list):
+    return [models.Employee.id] + [
+        column
+        for column in employee_out_columns
+        if (column.key in fields or (column.key == "role_names" and "roles" in fields))
+        and column.key != "id"
+    ]
+
+
+def convert_row_to_dict(row, fields: list = employee_out_fields):
+    employee = {}
+    for field in fields:
+        if field == "roles":
+            employee[field] = row.role_names
+        elif field == "phone_number":
+            employee[field] = str(row.phone_number)
+        else:
+            employee[field] = getattr(row, field)
+    return employee
+
+
 def div_ciel(nominater, denominater):
     full_pages = nominater // denominater
     additional_page = 1 if nominater % denominater > 0 else 0
@@ -96,25 +185,109 @@ def verify_confirmation_code(code: str, db: Session):
     return code_db
 
 
-def get_all(db: Session, pg_params: PaginationParams):
+full_name_column = func.lower(
+    models.Employee.first_name + literal_column("' '") + models.Employee.last_name
+)
+
+facet_columns = {
+    "contract_type": models.Employee.contract_type,
+    "gender": models.Employee.gender,
+    "account_status": models.Employee.account_status,
+}
+
+
+def filter_employees(query, pg_params: PaginationParams, exclude: str = None):
+    if pg_params.name != None:
+        query = query.filter(full_name_column.contains(func.lower(pg_params.name)))
+    for field, column in facet_columns.items():
+        value = getattr(pg_params, field)
+        if value is not None and field != exclude:
+            query = query.filter(column == value)
+    if pg_params.role is not None and exclude != "role":
+        query = query.filter(models.Employee.role_names.contains([pg_params.role]))
+    if pg_params.created_from is not None:
+        query = query.filter(models.Employee.created_on >= pg_params.created_from)
+    if pg_params.created_to is not None:
+        query = query.filter(models.Employee.created_on < pg_params.created_to)
+    return query
+
+
+def get_facets(db: Session, pg_params: PaginationParams):
+    facets = {}
+    for field, column in facet_columns.items():
+        query = filter_employees(
+            db.query(column, func.count()), pg_params, exclude=field
+        ).group_by(column)
+        facets[field] = {value.value: count for value, count in query}
+    roles = filter_employees(
+        db.query(func.unnest(models.Employee.role_names, type_=String).label("role")),
+        pg_params,
+        exclude="role",
+    ).subquery()
+    query = db.query(roles.c.role, func.count()).group_by(roles.c.role)
+    facets["role"] = {value: count for value, count in query}
+    return facets
+
+
+count_filter_fields = [
+    "name",
+    "contract_type",
+    "gender",
+    "account_status",
+    "role",
+    "created_from",
+    "created_to",
+]
+
+
+def get_count_key(pg_params: PaginationParams):
+    filters = repr([getattr(pg_params, field) for field in count_filter_fields])
+    return hashlib.sha1(filters.encode()).hexdigest()
+
+
+def estimate_count(db: Session, query, pg_params: PaginationParams):
+    if all(getattr(pg_params, field) is None for field in count_filter_fields):
+        estimate = db.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = 'employees'::regclass")
+        ).scalar()
+    else:
+        plan = db.execute(Explain(query.statement)).scalar()
+        estimate = plan[0]["Plan"]["Plan Rows"]
+    return max(int(estimate or 0), 0)
+
+
+def get_total_records(db: Session, query, pg_params: PaginationParams):
+    key = get_count_key(pg_params)
+    cached = count_cache.get(key)
+    if cached is not None:
+        return (int(cached), False)
+    if pg_params.count == CountMode.estimate:
+        estimate = estimate_count(db, query, pg_params)
+        if estimate >= settings.COUNT_ESTIMATE_THRESHOLD:
+            return (estimate, True)
+    total_records = query.count()
+    count_cache.set(key, str(total_records).encode())
+    return (total_records, False)
+
+
+@traced()
+def get_all(
+    db: Session, pg_params: PaginationParams, fields: list = employee_out_fields
+):
     try:
         skip = pg_params.limit * (pg_params.page - 1)
-        query = db.query(models.Employee)
-        if pg_params.name != None:
-            query = query.filter(
-                func.lower(
-                    func.concat(
-                        models.Employee.first_name, " ", models.Employee.last_name
-                    )
-                ).contains(func.lower(pg_params.name))
-            )
-        total_records = query.count()
+        query = filter_employees(db.query(*get_fields_columns(fields)), pg_params)
+        total_records, approximate = get_total_records(db, query, pg_params)
         total_pages = div_ciel(total_records, pg_params.limit)
-        result = query.limit(pg_params.limit).offset(skip).all()
+        rows = (
+            query.order_by(models.Employee.id).limit(pg_params.limit).offset(skip).all()
+        )
         return {
             "total_records": total_records,
+            "total_records_approximate": approximate,
             "total_pages": total_pages,
-            "employees": result,
+            "employees": [convert_row_to_dict(row, fields) for row in rows],
+            "facets": get_facets(db, pg_params) if pg_params.facets else None,
         }
     except Exception as error:
         error_detail = get_error_detail(str(error), error_keys)
@@ -124,11 +297,111 @@ def get_all(db: Session, pg_params: PaginationParams):
         )
 
 
+def cache_employee(employee: models.Employee):
+    cached = schemas.CachedEmployee.model_validate(employee)
+    employee_cache.set(f"id:{employee.id}", cached.model_dump_json().encode())
+    employee_cache.set(f"email:{employee.email}", str(employee.id).encode())
+
+
+def get_cached_employee(id: int):
+    cached = employee_cache.get(f"id:{id}")
+    if cached is None:
+        return None
+    try:
+        values = schemas.CachedEmployee.model_validate_json(cached)
+    except ValidationError:
+        return None
+    # the password is not cached, it stays expired and loads on first access
+    employee = models.Employee(**values.model_dump())
+    make_transient_to_detached(employee)
+    return employee
+
+
+def invalidate_employee_cache(*ids: int):
+    employee_cache.delete(*[f"id:{id}" for id in ids])
+    security_version_cache.delete(*[str(id) for id in ids])
+    count_cache.clear()
+
+
+def notify_employee_changed(db: Session, *ids: int):
+    notify(db, employee_changed_channel, ids)
+
+
+def on_employee_changed(payload: str):
+    if payload == EPOCH:
+        employee_cache.clear()
+        security_version_cache.clear()
+        count_cache.clear()
+    else:
+        invalidate_employee_cache(*parse_id_ranges(payload))
+
+
+def encode_cursor(updated_on: datetime, id: int):
+    return base64.urlsafe_b64encode(f"{updated_on.isoformat()}|{id}".encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        updated_on, id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return (datetime.fromisoformat(updated_on), int(id))
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+# updated_on is taken when a row is written, not when its transaction commits,
+# so only rows older than CHANGES_SAFETY_LAG_SECONDS are returned. A change is
+# guaranteed to reach the feed if its transaction commits within that lag.
+@traced()
+def get_changes(db: Session, since: str | None, limit: int):
+    query = db.query(*employee_out_columns).filter(
+        models.Employee.updated_on
+        < func.now() - timedelta(seconds=settings.CHANGES_SAFETY_LAG_SECONDS)
+    )
+    if since is not None:
+        query = query.filter(
+            tuple_(models.Employee.updated_on, models.Employee.id)
+            > tuple_(*decode_cursor(since))
+        )
+    try:
+        rows = (
+            query.order_by(models.Employee.updated_on, models.Employee.id)
+            .limit(limit + 1)
+            .all()
+        )
+    except Exception as error:
+        error_detail = get_error_detail(str(error), error_keys)
+        raise HTTPException(
+            status_code=error_detail["status"],
+            detail=error_detail["message"],
+        )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "employees": [convert_row_to_dict(row) for row in rows],
+        "next_cursor": (
+            encode_cursor(rows[-1].updated_on, rows[-1].id) if rows else since
+        ),
+        "has_more": has_more,
+    }
+
+
+@traced()
 def get_employee_by_id(id: int, db: Session):
     try:
-        employee = db.query(models.Employee).filter(models.Employee.id == id).first()
+        cached = get_cached_employee(id)
+        if cached is not None:
+            return db.merge(cached, load=False)
+        employee = (
+            db.query(models.Employee)
+            .options(undefer(models.Employee.password))
+            .filter(models.Employee.id == id)
+            .first()
+        )
         if not employee:
             return None
+        cache_employee(employee)
     except Exception as error:
         error_detail = get_error_detail(str(error), error_keys)
         raise HTTPException(
@@ -140,11 +413,20 @@ def get_employee_by_id(id: int, db: Session):
 
 def get_employee_by_email(email: str, db: Session):
     try:
+        cached_id = employee_cache.get(f"email:{email}")
+        if cached_id is not None:
+            cached = get_cached_employee(int(cached_id))
+            if cached is not None and cached.email == email:
+                return db.merge(cached, load=False)
         employee = (
-            db.query(models.Employee).filter(models.Employee.email == email).first()
+            db.query(models.Employee)
+            .options(undefer(models.Employee.password))
+            .filter(models.Employee.email == email)
+            .first()
         )
         if not employee:
             return None
+        cache_employee(employee)
     except Exception as error:
         error_detail = get_error_detail(str(error), error_keys)
         raise HTTPException(
@@ -154,28 +436,81 @@ def get_employee_by_email(email: str, db: Session):
     return employee
 
 
-async def create_employee(employee_dict: dict, db: Session):
+@traced()
+def get_employee_fields(id: int, db: Session, fields: list):
+    try:
+        row = (
+            db.query(*get_fields_columns(fields))
+            .filter(models.Employee.id == id)
+            .first()
+        )
+    except Exception as error:
+        error_detail = get_error_detail(str(error), error_keys)
+        raise HTTPException(
+            status_code=error_detail["status"],
+            detail=error_detail["message"],
+        )
+    if row is None:
+        return None
+    return convert_row_to_dict(row, fields)
+
+
+@traced()
+def get_employees_by_ids(ids: list, db: Session, fields: list = employee_out_fields):
+    ids = list(dict.fromkeys(ids))
+    try:
+        rows = (
+            db.query(*get_fields_columns(fields))
+            .filter(models.Employee.id.in_(ids))
+            .all()
+        )
+    except Exception as error:
+        error_detail = get_error_detail(str(error), error_keys)
+        raise HTTPException(
+            status_code=error_detail["status"],
+            detail=error_detail["message"],
+        )
+    rows_by_id = {row.id: row for row in rows}
+    return {
+        "employees": [
+            convert_row_to_dict(rows_by_id[id], fields)
+            for id in ids
+            if id in rows_by_id
+        ],
+        "missing_ids": [id for id in ids if id not in rows_by_id],
+    }
+
+
+def get_role_names(roles):
+    return sorted(set(roles), key=list(Role).index)
+
+
+@traced()
+def create_employee(employee_dict: dict, db: Session):
     try:
         roles = employee_dict.pop("roles")
-        new_emp = models.Employee(**employee_dict)
+        new_emp = models.Employee(**employee_dict, role_names=get_role_names(roles))
         db.add(new_emp)
         db.flush()
         db.add_all(
             [models.EmployeeRole(role=role, employee_id=new_emp.id) for role in roles]
         )
         new_token = add_confirmation_code(db, new_emp)
-        await send_mail(
+        enqueue_mail(
+            db,
             schemas.MailData(
                 emails=[new_emp.email],
                 body={
                     "name": f"{new_emp.first_name} {new_emp.last_name}",
-                    "token": new_token.token,
+                    "token": str(new_token.token),
                 },
                 template="confirm_account.html",
                 subject="Confirm Account",
-            )
+            ),
         )
+        notify_employee_changed(db, new_emp.id)
         db.commit()
+        invalidate_employee_cache(new_emp.id)
         db.refresh(new_emp)
         return new_emp
     except Exception as error:
@@ -188,7 +523,8 @@ async def create_employee(employee_dict: dict, db: Session):
         )
 
 
-async def edit_employee(employee_id: int, update_data: dict, db: Session):
+@traced()
+def edit_employee(employee_id: int, update_data: dict, db: Session):
     try:
         employee_to_update = get_employee_by_id(employee_id, db)
         if employee_to_update is None:
@@ -204,31 +540,41 @@ async def edit_employee(employee_id: int, update_data: dict, db: Session):
         {update_data.pop(key, None) for key in ["confirm_password", "actual_password"]}
         if update_data["password"] != None:
             update_data["password"] = hash_password(update_data["password"])
-        for k, v in update_data.items():
-            if v is None:
-                update_data[k] = employee_to_update.__dict__[k]
-        last_email = employee_to_update.email
-        db.query(models.Employee).filter(models.Employee.id == employee_id).update(
-            update_data, synchronize_session=False
-        )
-        db.flush()
-        db.refresh(employee_to_update)
-        if employee_to_update.email != last_email:
-            new_token = add_confirmation_code(db, employee_to_update)
-            await send_mail(
+        changes = {
+            k: v
+            for k, v in update_data.items()
+            if v is not None
+            and (k == "password" or getattr(employee_to_update, k) != v)
+        }
+        if not changes:
+            return convert_row_to_dict(employee_to_update)
+        if "email" in changes:
+            changes["account_status"] = AccountStatus.Inactive
+        updated = db.execute(
+            update(models.Employee)
+            .where(models.Employee.id == employee_id)
+            .values(changes)
+            .returning(*employee_out_columns)
+            .execution_options(synchronize_session=False)
+        ).one()
+        if "email" in changes:
+            new_token = add_confirmation_code(db, updated)
+            enqueue_mail(
+                db,
                 schemas.MailData(
-                    emails=[employee_to_update.email],
+                    emails=[updated.email],
                     body={
-                        "name": f"{employee_to_update.first_name} {employee_to_update.last_name}",
-                        "token": new_token.token,
+                        "name": f"{updated.first_name} {updated.last_name}",
+                        "token": str(new_token.token),
                     },
                     template="confirm_email.html",
                     subject="Confirm Email",
-                )
+                ),
             )
-            employee_to_update.account_status = AccountStatus.Inactive
+        notify_employee_changed(db, employee_id)
         db.commit()
-        return employee_to_update
+        invalidate_employee_cache(employee_id)
+        return convert_row_to_dict(updated)
     except HTTPException as http_error:
         raise http_error
     except Exception as error:
@@ -241,6 +587,7 @@ async def edit_employee(employee_id: int, update_data: dict, db: Session):
         )
 
 
+@traced()
 def confirmation_account(code: str, password: str, db: Session):
     try:
         code_db = verify_confirmation_code(code, db)
@@ -255,7 +602,9 @@ def confirmation_account(code: str, password: str, db: Session):
         db.query(models.AccountActivation).filter(
             models.AccountActivation.id == code_db.id
         ).update({"status": TokenStatus.Used.value})
+        notify_employee_changed(db, code_db.employee_id)
         db.commit()
+        invalidate_employee_cache(code_db.employee_id)
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={"message": "Activation account successfully"},
@@ -272,6 +621,7 @@ def confirmation_account(code: str, password: str, db: Session):
         )
 
 
+@traced()
 def confirmation_email(code: str, db: Session):
     try:
         code_db = verify_confirmation_code(code, db)
@@ -279,7 +629,9 @@ def confirmation_email(code: str, db: Session):
             models.Employee.id == code_db.employee_id
         ).update({"account_status": AccountStatus.Active})
         code_db.status = TokenStatus.Used
+        notify_employee_changed(db, code_db.employee_id)
         db.commit()
+        invalidate_employee_cache(code_db.employee_id)
         return JSONResponse(
             status_code=status.HTTP_200_OK, content={"message": "Email confirmed"}
         )
@@ -0,0 +1,110 @@
+from datetime import timedelta
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.enums import IdempotencyStatus
+from app.utilities.tracing import traced
+
+
+def key_filter(principal: str, key: str, route: str):
+    return (
+        models.IdempotencyKey.principal == principal,
+        models.IdempotencyKey.key == key,
+        models.IdempotencyKey.route == route,
+    )
+
+
+def get_key(principal: str, key: str, route: str):
+    with SessionLocal() as db:
+        return (
+            db.query(
+                models.IdempotencyKey.fingerprint,
+                models.IdempotencyKey.status,
+                models.IdempotencyKey.response_status,
+                models.IdempotencyKey.response_body,
+                models.IdempotencyKey.media_type,
+                models.IdempotencyKey.response_headers,
+            )
+            .filter(*key_filter(principal, key, route))
+            .first()
+        )
+
+
+@traced()
+def claim_key(principal: str, key: str, route: str, fingerprint: str):
+    with SessionLocal() as db:
+        db.execute(
+            delete(models.IdempotencyKey).where(
+                models.IdempotencyKey.expires_on < func.now()
+            )
+        )
+        claimed = db.execute(
+            pg_insert(models.IdempotencyKey)
+            .values(
+                principal=principal,
+                key=key,
+                route=route,
+                fingerprint=fingerprint,
+                status=IdempotencyStatus.InProgress,
+                expires_on=func.now()
+                + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+            )
+            .on_conflict_do_nothing()
+            .returning(models.IdempotencyKey.key)
+        ).first()
+        db.commit()
+    if claimed:
+        return (True, None)
+    return (False, get_key(principal, key, route))
+
+
+def extend_key(principal: str, key: str, route: str):
+    with SessionLocal() as db:
+        db.execute(
+            update(models.IdempotencyKey)
+            .where(
+                *key_filter(principal, key, route),
+                models.IdempotencyKey.status == IdempotencyStatus.InProgress,
+            )
+            .values(
+                expires_on=func.now()
+                + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+            )
+        )
+        db.commit()
+
+
+@traced()
+def complete_key(
+    principal: str,
+    key: str,
+    route: str,
+    status_code: int,
+    body: bytes,
+    media_type,
+    headers: list,
+):
+    with SessionLocal() as db:
+        db.execute(
+            update(models.IdempotencyKey)
+            .where(*key_filter(principal, key, route))
+            .values(
+                status=IdempotencyStatus.Completed,
+                response_status=status_code,
+                response_body=body,
+                media_type=media_type,
+                response_headers=headers,
+                expires_on=func.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+            )
+        )
+        db.commit()
+
+
+def release_key(principal: str, key: str, route: str):
+    with SessionLocal() as db:
+        db.execute(
+            delete(models.IdempotencyKey).where(*key_filter(principal, key, route))
+        )
+        db.commit()
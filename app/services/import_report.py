@@ -0,0 +1,87 @@
+from itertools import groupby
+from typing import Optional
+from app import schemas
+
+
+class ImportReport:
+    def __init__(self):
+        self.messages = {}
+        self.errors = []
+        self.warnings = []
+        self.row_indexes = []
+        self.col_indexes = []
+        self.message_ids = []
+        self.counts_by_field = {}
+
+    def intern(self, message: str):
+        return self.messages.setdefault(message, len(self.messages))
+
+    def add_wrong_cell(self, message: str, cell: schemas.MatchyCell, field: str):
+        self.row_indexes.append(int(cell.rowIndex))
+        self.col_indexes.append(int(cell.colIndex))
+        self.message_ids.append(self.intern(message))
+        self.counts_by_field[field] = self.counts_by_field.get(field, 0) + 1
+
+    def add(
+        self,
+        message: str,
+        is_error: bool,
+        line: Optional[int] = None,
+        field: Optional[str] = None,
+        cell: Optional[schemas.MatchyCell] = None,
+    ):
+        (self.errors if is_error else self.warnings).append(
+            (line, self.intern(message))
+        )
+        if cell is not None:
+            self.add_wrong_cell(message, cell, field)
+
+    def has_errors(self):
+        return bool(self.errors)
+
+    def has_warnings(self):
+        return bool(self.warnings)
+
+    def render(self, entries: list):
+        messages = list(self.messages)
+        rendered = []
+        for line, group in groupby(entries, key=lambda entry: entry[0]):
+            text = ("\n").join(messages[message_id] for _, message_id in group)
+            rendered.append(text if line is None else f"\nLine {line}:\n{text}")
+        return ("\n").join(rendered)
+
+    def to_compact(self):
+        return schemas.MatchyCompactReport(
+            messages=list(self.messages),
+            errorLines=[line for line, _ in self.errors],
+            errorMessageIds=[message_id for _, message_id in self.errors],
+            warningLines=[line for line, _ in self.warnings],
+            warningMessageIds=[message_id for _, message_id in self.warnings],
+            rowIndex=self.row_indexes,
+            colIndex=self.col_indexes,
+            messageId=self.message_ids,
+            countsByField=self.counts_by_field,
+        )
+
+    def to_response(self, compact: bool, detail: str, status_code: int):
+        if compact:
+            return schemas.ImportResponse(
+                compactReport=self.to_compact(),
+                detail=detail,
+                status_code=status_code,
+            )
+        messages = list(self.messages)
+        return schemas.ImportResponse(
+            errors=self.render(self.errors),
+            warnings=self.render(self.warnings),
+            wrongCells=[
+                schemas.MatchyWrongCell(
+                    message=messages[message_id], rowIndex=row, colIndex=col
+                )
+                for row, col, message_id in zip(
+                    self.row_indexes, self.col_indexes, self.message_ids
+                )
+            ],
+            detail=detail,
+            status_code=status_code,
+        )
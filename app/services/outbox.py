@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from datetime import timedelta
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.config import settings
+from app.database import SessionLocal
+from app.enums import OutboxStatus
+from app.utilities import send_mail
+from app.utilities.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_mail(db: Session, mail_data: schemas.MailData):
+    enqueue_mails(db, [mail_data])
+
+
+@traced()
+def enqueue_mails(db: Session, mails_data: list):
+    if mails_data:
+        db.execute(
+            insert(models.Outbox),
+            [
+                {"payload": mail_data.model_dump(mode="json")}
+                for mail_data in mails_data
+            ],
+        )
+
+
+@traced()
+def claim_batch():
+    with SessionLocal() as db:
+        db.execute(
+            update(models.Outbox)
+            .where(
+                models.Outbox.status == OutboxStatus.Pending,
+                models.Outbox.available_on <= func.now(),
+                models.Outbox.attempts >= settings.OUTBOX_MAX_ATTEMPTS,
+            )
+            .values(
+                status=OutboxStatus.Failed,
+                last_error="Lease expired on the last attempt",
+            )
+            .execution_options(synchronize_session=False)
+        )
+        claimable = (
+            select(models.Outbox.id)
+            .where(
+                models.Outbox.status == OutboxStatus.Pending,
+                models.Outbox.available_on <= func.now(),
+                models.Outbox.attempts < settings.OUTBOX_MAX_ATTEMPTS,
+            )
+            .order_by(models.Outbox.id)
+            .limit(settings.OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = db.execute(
+            update(models.Outbox)
+            .where(models.Outbox.id.in_(claimable.scalar_subquery()))
+            .values(
+                attempts=models.Outbox.attempts + 1,
+                available_on=func.now()
+                + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+            )
+            .returning(models.Outbox.id, models.Outbox.payload, models.Outbox.attempts)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        return claimed
+
+
+@traced()
+def record_results(sent: list, failed: list):
+    with SessionLocal() as db:
+        if sent:
+            db.execute(
+                update(models.Outbox)
+                .where(models.Outbox.id.in_(sent))
+                .values(status=OutboxStatus.Sent, sent_on=func.now(), last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+        for id, attempts, error in failed:
+            values = {"last_error": error}
+            if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                values["status"] = OutboxStatus.Failed
+            else:
+                values["available_on"] = func.now() + timedelta(
+                    seconds=settings.OUTBOX_RETRY_SECONDS * 2 ** (attempts - 1)
+                )
+            db.execute(
+                update(models.Outbox)
+                .where(models.Outbox.id == id)
+                .values(values)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+
+
+async def dispatch_batch():
+    claimed = await asyncio.to_thread(claim_batch)
+    sent = []
+    failed = []
+    for id, payload, attempts in claimed:
+        try:
+            await send_mail(schemas.MailData(**payload))
+            sent.append(id)
+        except Exception as error:
+            failed.append((id, attempts, str(error)))
+    if claimed:
+        await asyncio.to_thread(record_results, sent, failed)
+    return len(claimed)
+
+
+async def run_dispatcher():
+    while True:
+        try:
+            if await dispatch_batch() < settings.OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(settings.OUTBOX_POLL_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            logger.warning("Outbox dispatch failed: %s", error)
+            await asyncio.sleep(settings.OUTBOX_POLL_SECONDS)
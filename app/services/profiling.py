@@ -0,0 +1,49 @@
+import json
+import os
+import re
+from fastapi import HTTPException, status
+from fastapi.responses import FileResponse
+from app.config import settings
+
+capture_id_regex = r"^[0-9a-f]{32}$"
+
+
+def get_capture_path(id: str, extension: str):
+    if not re.match(capture_id_regex, id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Capture not found"
+        )
+    path = os.path.join(settings.PROFILING_DIR, f"{id}.{extension}")
+    if not os.path.exists(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Capture not found"
+        )
+    return path
+
+
+def list_captures():
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return []
+    captures = []
+    for entry in os.scandir(settings.PROFILING_DIR):
+        if entry.name.endswith(".json"):
+            with open(entry.path, encoding="utf-8") as file:
+                capture = json.load(file)
+            capture.pop("statements", None)
+            captures.append(capture)
+    return sorted(captures, key=lambda capture: capture["started_on"], reverse=True)
+
+
+def get_capture(id: str):
+    with open(get_capture_path(id, "json"), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def download_profile(id: str):
+    capture = get_capture(id)
+    if capture["profile_format"] is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Capture has no profile"
+        )
+    path = get_capture_path(id, capture["profile_format"])
+    return FileResponse(path, filename=os.path.basename(path))
@@ -1,5 +1,8 @@
+import json
 import uuid
-from fastapi import HTTPException, status, BackgroundTasks
+from fastapi import HTTPException, status
+from sqlalchemy import insert, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 import re
 from datetime import datetime
@@ -10,10 +13,27 @@ from app.enums import (
     ContractType,
     Gender,
     Role,
+    AccountStatus,
+    ImportMode,
+    ReportFormat,
 )
 from app import schemas, models
 from app.services.error import add_error
-from app.utilities import send_mail
+from app.services.import_report import ImportReport
+from app.services.employee import (
+    get_role_names,
+    invalidate_employee_cache,
+    notify_employee_changed,
+)
+from app.services.outbox import enqueue_mails
+from app.utilities.progress import ImportProgress
+from app.utilities.tracing import traced
+from app.utilities.spreadsheet import (
+    iter_csv_rows,
+    iter_xlsx_rows,
+    read_mapped_lines,
+    columnar_lines,
+)
 
 email_regex = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b"
 cnss_regex = r"^\d{8}-\d{2}$"
@@ -163,7 +183,7 @@ def is_positive_int(field: str):
 def is_valid_date(field):
     try:
         obj = datetime.strptime(field, "%Y-%m-%d")
-        return obj.isoformat()
+        return obj.date()
     except Exception:
         return None
 
@@ -230,178 +250,391 @@ def is_field_mandatory(field, employee):
     )
 
 
-def validate_employee_data(employee):
-    errors = []
-    warnings = []
-    wrong_cells = []
+def validate_employee_data(employee, line: int, report: ImportReport):
     employee_to_add = {field: cell.value for field, cell in employee.items()}
     for field in possible_fields:
         if field not in employee:
             if is_field_mandatory(field, employee):
-                errors.append(f"{possible_fields[field]} is mandatory but missing ")
+                report.add(
+                    f"{possible_fields[field]} is mandatory but missing ", True, line
+                )
             continue
         cell = employee[field]
         employee_to_add[field] = employee_to_add[field].strip()
         if employee_to_add[field] == "":
             if is_field_mandatory(field, employee):
                 msg = f"{possible_fields[field][0]} is mandatory but missing "
-                errors.append(msg)
-                wrong_cells.append(
-                    schemas.MatchyWrongCell(
-                        message=msg,
-                        rowIndex=int(cell.rowIndex),
-                        colIndex=int(cell.colIndex),
-                    )
-                )
+                report.add(msg, True, line, field, cell)
             else:
                 employee_to_add[field] = None
         elif field in fields_check:
             converted_val = fields_check[field][0](employee_to_add[field])
             if converted_val is None:
                 msg = fields_check[field][1]
-                (errors if is_field_mandatory(field, employee) else warnings).append(
-                    msg
-                )
-                wrong_cells.append(
-                    schemas.MatchyWrongCell(
-                        message=msg,
-                        rowIndex=int(cell.rowIndex),
-                        colIndex=int(cell.colIndex),
-                    )
-                )
+                report.add(msg, is_field_mandatory(field, employee), line, field, cell)
             else:
                 employee_to_add[field] = converted_val
-    return (errors, warnings, wrong_cells, employee_to_add)
+    return employee_to_add
+
+
+def add_activation_tokens(employees: list, template: str, subject: str, db: Session):
+    tokens_to_add = []
+    email_data = []
+    for emp in employees:
+        new_token = models.AccountActivation(
+            employee_id=emp.id, email=emp.email, token=uuid.uuid4()
+        )
+        tokens_to_add.append(new_token)
+        email_data.append(
+            schemas.MailData(
+                emails=[emp.email],
+                body={
+                    "name": f"{emp.first_name} {emp.last_name}",
+                    "token": str(new_token.token),
+                },
+                subject=subject,
+                template=template,
+            )
+        )
+    db.bulk_save_objects(tokens_to_add)
+    enqueue_mails(db, email_data)
+
+
+@traced()
+def match_existing_employees(
+    employees: list, employees_to_add: list, report: ImportReport, db: Session
+):
+    emails = {emp["email"] for emp in employees_to_add}
+    numbers = {emp["number"] for emp in employees_to_add}
+    existing = (
+        db.query(models.Employee)
+        .filter(
+            or_(models.Employee.email.in_(emails), models.Employee.number.in_(numbers))
+        )
+        .all()
+    )
+    by_email = {emp.email: emp for emp in existing}
+    by_number = {emp.number: emp for emp in existing}
+    matches = []
+    matched_lines = {}
+    for line, (employee, emp) in enumerate(zip(employees, employees_to_add)):
+        matched_by_email = by_email.get(emp["email"])
+        matched_by_number = by_number.get(emp["number"])
+        if (
+            matched_by_email
+            and matched_by_number
+            and matched_by_email.id != matched_by_number.id
+        ):
+            msg = f"Email {emp['email']} and number {emp['number']} belong to different employees in database"
+            report.add(msg, True, line + 1, "email", employee["email"])
+        match = matched_by_email or matched_by_number
+        if match is not None:
+            if match.id in matched_lines:
+                field = "email" if match is matched_by_email else "number"
+                msg = f"This line matches the same employee in database as line {matched_lines[match.id]}"
+                report.add(msg, True, line + 1, field, employee[field])
+            else:
+                matched_lines[match.id] = line + 1
+        matches.append(match)
+    return matches
+
+
+@traced()
+def insert_employees(
+    employees_to_add: list,
+    roles_per_email: dict,
+    progress: ImportProgress,
+    db: Session,
+):
+    new_employees = [
+        models.Employee(**emp, role_names=get_role_names(roles_per_email[emp["email"]]))
+        for emp in employees_to_add
+    ]
+    db.add_all(new_employees)
+    db.flush()
+    db.bulk_save_objects(
+        [
+            models.EmployeeRole(employee_id=empl.id, role=role)
+            for empl in new_employees
+            for role in roles_per_email[empl.email]
+        ]
+    )
+    progress.update("rows_inserted", len(new_employees), len(new_employees), True)
+    add_activation_tokens(new_employees, "confirm_account.html", "Confirm Account", db)
+    progress.update("emails_queued", len(new_employees), len(new_employees), True)
+    return (
+        schemas.ImportSummary(inserted=len(new_employees)),
+        [empl.id for empl in new_employees],
+    )
 
 
+@traced()
+def upsert_employees(
+    employees_to_add: list,
+    matches: list,
+    roles_per_email: dict,
+    progress: ImportProgress,
+    db: Session,
+):
+    summary = schemas.ImportSummary()
+    updated_ids = []
+    new_rows = []
+    rows_to_update = []
+    changed_email_ids = set()
+    roles_to_reconcile = {}
+    for emp, db_employee in zip(employees_to_add, matches):
+        role_names = get_role_names(roles_per_email[emp["email"]])
+        if db_employee is None:
+            new_rows.append({**emp, "role_names": role_names})
+            continue
+        roles = set(role_names)
+        columns_changed = any(
+            getattr(db_employee, field) != value for field, value in emp.items()
+        )
+        roles_changed = roles != set(db_employee.role_names)
+        if not columns_changed and not roles_changed:
+            summary.unchanged += 1
+            continue
+        summary.updated += 1
+        updated_ids.append(db_employee.id)
+        email_changed = emp["email"] != db_employee.email
+        if email_changed:
+            changed_email_ids.add(db_employee.id)
+        rows_to_update.append(
+            {
+                **emp,
+                "role_names": role_names,
+                "id": db_employee.id,
+                "account_status": (
+                    AccountStatus.Inactive
+                    if email_changed
+                    else db_employee.account_status
+                ),
+            }
+        )
+        if roles_changed:
+            roles_to_reconcile[db_employee.id] = roles
+    if new_rows:
+        inserted = db.execute(
+            insert(models.Employee).returning(
+                models.Employee.id,
+                models.Employee.email,
+                models.Employee.first_name,
+                models.Employee.last_name,
+                sort_by_parameter_order=True,
+            ),
+            new_rows,
+        ).all()
+        for emp in inserted:
+            roles_to_reconcile[emp.id] = set(roles_per_email[emp.email])
+        progress.update("rows_inserted", len(inserted), len(new_rows), True)
+        add_activation_tokens(inserted, "confirm_account.html", "Confirm Account", db)
+        progress.update("emails_queued", len(inserted), len(new_rows), True)
+        summary.inserted = len(inserted)
+    if rows_to_update:
+        stmt = pg_insert(models.Employee)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Employee.id],
+            set_={
+                field: stmt.excluded[field]
+                for field in rows_to_update[0]
+                if field != "id"
+            },
+        ).returning(
+            models.Employee.id,
+            models.Employee.email,
+            models.Employee.first_name,
+            models.Employee.last_name,
+        )
+        updated = db.execute(stmt, rows_to_update).all()
+        add_activation_tokens(
+            [emp for emp in updated if emp.id in changed_email_ids],
+            "confirm_email.html",
+            "Confirm Email",
+            db,
+        )
+    if roles_to_reconcile:
+        role_rows = [
+            {"employee_id": employee_id, "role": role}
+            for employee_id, roles in roles_to_reconcile.items()
+            for role in roles
+        ]
+        db.execute(
+            pg_insert(models.EmployeeRole).on_conflict_do_nothing(
+                constraint="unique_employee_role"
+            ),
+            role_rows,
+        )
+        db.query(models.EmployeeRole).filter(
+            models.EmployeeRole.employee_id.in_(roles_to_reconcile.keys()),
+            tuple_(models.EmployeeRole.employee_id, models.EmployeeRole.role).not_in(
+                [(row["employee_id"], row["role"]) for row in role_rows]
+            ),
+        ).delete(synchronize_session=False)
+    return (summary, updated_ids)
+
+
+@traced()
 def validate_employees_data_and_upload(
     employees: list,
     force_upload: bool,
-    background_tasks: BackgroundTasks,
     db: Session,
+    mode: ImportMode = ImportMode.insert,
+    report_format: ReportFormat = ReportFormat.full,
+    progress: ImportProgress = ImportProgress(None),
 ):
-    try:
-        errors = []
-        warnings = []
-        wrong_cells = []
-        employees_to_add = []
-        roles_per_email = {}
+    report = ImportReport()
+    employees_to_add = []
+    roles_per_email = {}
+    for line, employee in enumerate(employees):
+        if line % 256 == 0:
+            progress.update("validating", line, len(employees))
+        emp = validate_employee_data(employee, line + 1, report)
+        roles_per_email[emp.get("email")] = emp.pop("employee_roles")
+        employees_to_add.append(emp)
+    for field in unique_fields:
+        values = set()
         for line, employee in enumerate(employees):
-            emp_errors, emp_warnings, emp_wrong_cells, emp = validate_employee_data(
-                employee
-            )
-            if emp_errors:
-                msg = ("\n").join(emp_errors)
-                errors.append(f"\nLine {line+1}:\n{msg}")
-            if emp_warnings:
-                msg = ("\n").join(emp_warnings)
-                warnings.append(f"\nLine {line+1}:\n{msg}")
-            if emp_wrong_cells:
-                wrong_cells.extend(emp_wrong_cells)
-            roles_per_email[emp.get("email")] = emp.pop("employee_roles")
-            employees_to_add.append(models.Employee(**emp))
-        for field in unique_fields:
-            values = set()
-            for line, employee in enumerate(employees):
-                cell = employee.get(field)
-                val = cell.value.strip()
-                if val == "":
-                    continue
-                if val in values:
-                    msg = f"{possible_fields[field]} should be unique but this value exists more than one time in the file"
-                    (
-                        errors if is_field_mandatory(field, employee) else warnings
-                    ).append(msg)
-                    wrong_cells.append(
-                        schemas.MatchyWrongCell(
-                            message=msg,
-                            rowIndex=int(cell.rowIndex),
-                            colIndex=int(cell.colIndex),
-                        )
-                    )
-                else:
-                    values.add(val)
-            duplicated_vals = (
-                db.query(models.Employee).filter(unique_fields[field].in_(values)).all()
-            )
-            duplicated_vals = {str(val[0]) for val in duplicated_vals}
-            if duplicated_vals:
-                msg = f"{possible_fields[field]} should be unique {(', ').join([str(val[0]) for val in  duplicated_vals])} already exist in database"
-                (errors if is_field_mandatory(field, employee) else warnings).append(
-                    msg
+            cell = employee.get(field)
+            val = cell.value.strip()
+            if val == "":
+                continue
+            if val in values:
+                msg = f"{possible_fields[field]} should be unique but this value exists more than one time in the file"
+                report.add(
+                    msg,
+                    is_field_mandatory(field, employee),
+                    field=field,
+                    cell=cell,
                 )
-                for emp in employees:
-                    cell = emp.get(field)
-                    val = cell.value.strip()
-                    if val in duplicated_vals:
-                        wrong_cells.append(
-                            schemas.MatchyWrongCell(
-                                message=f"{possible_fields[field]} should be unique. {val} already exist in database",
-                                rowIndex=cell.rowIndex,
-                                colIndex=cell.colIndex,
-                            )
-                        )
-                wrong_cells.append(
-                    schemas.MatchyWrongCell(
-                        message=msg,
-                        rowIndex=int(cell.rowIndex),
-                        colIndex=int(cell.colIndex),
+            else:
+                values.add(val)
+        if mode == ImportMode.upsert:
+            continue
+        duplicated_vals = (
+            db.query(unique_fields[field])
+            .filter(unique_fields[field].in_(values))
+            .all()
+        )
+        duplicated_vals = {str(val[0]) for val in duplicated_vals}
+        if duplicated_vals:
+            msg = f"{possible_fields[field]} should be unique {(', ').join(duplicated_vals)} already exist in database"
+            report.add(msg, is_field_mandatory(field, employee))
+            for emp in employees:
+                cell = emp.get(field)
+                val = cell.value.strip()
+                if val in duplicated_vals:
+                    report.add_wrong_cell(
+                        f"{possible_fields[field]} should be unique. {val} already exist in database",
+                        cell,
+                        field,
                     )
-                )
-        if errors or (warnings and not force_upload):
-            return schemas.ImportResponse(
-                errors=("\n").join(errors),
-                warnings=("\n").join(warnings),
-                wrongCells=wrong_cells,
-                detail="Somthing went wrong",
-                status_code=400,
-            )
-        db.add_all(employees_to_add)
-        db.flush()
-        db.bulk_save_objects(
-            [
-                models.EmployeeRole(employee_id=empl.id, role=role)
-                for empl in employees_to_add
-                for role in roles_per_email[empl.email]
-            ]
+            report.add_wrong_cell(msg, cell, field)
+    progress.update("duplicates_checked", len(employees), len(employees), True)
+    matches = []
+    if mode == ImportMode.upsert and not report.has_errors():
+        matches = match_existing_employees(employees, employees_to_add, report, db)
+    if report.has_errors() or (report.has_warnings() and not force_upload):
+        return report.to_response(
+            compact=report_format == ReportFormat.compact,
+            detail="Somthing went wrong",
+            status_code=400,
         )
-        tokens_to_add = []
-        email_data = []
-        for emp in employees_to_add:
-            new_token = models.AccountActivation(
-                employee_id=emp.id, email=emp.email, token=uuid.uuid4()
-            )
-            tokens_to_add.append(new_token)
-            email_data.append(
-                schemas.MailData(
-                    emails=[emp.email],
-                    body={
-                        "name": f"{emp.first_name} {emp.last_name}",
-                        "token": new_token.token,
-                    },
-                    subject="Confirm Account",
-                    template="confirm_account.html",
-                )
-            )
-        db.bulk_save_objects(tokens_to_add)
-        for email_datum in email_data:
-            background_tasks.add_task(send_mail, email_datum)
-        db.commit()
-    except Exception as error:
-        raise HTTPException(status_code=400, detail=str(error))
-    return schemas.ImportResponse(detail="File uploaded successfully", status_code=201)
+    if mode == ImportMode.upsert:
+        summary, updated_ids = upsert_employees(
+            employees_to_add, matches, roles_per_email, progress, db
+        )
+    else:
+        summary, updated_ids = insert_employees(
+            employees_to_add, roles_per_email, progress, db
+        )
+    notify_employee_changed(db, *updated_ids)
+    db.commit()
+    invalidate_employee_cache(*updated_ids)
+    return schemas.ImportResponse(
+        detail="File uploaded successfully", status_code=201, summary=summary
+    )
+
+
+file_readers = {"csv": iter_csv_rows, "xlsx": iter_xlsx_rows}
 
 
 def get_possible_fields():
     return schemas.ImportPossibleFields(possible_fields=options)
 
 
-def upload(
-    entry: schemas.UploadEntry,
-    background_tasks: BackgroundTasks,
+@traced()
+def upload(entry: schemas.UploadEntry, db: Session):
+    return import_lines(
+        entry.lines,
+        entry.force_upload,
+        entry.mode,
+        entry.report_format,
+        db,
+        entry.import_id,
+    )
+
+
+@traced()
+def upload_columnar(entry: schemas.ColumnarUploadEntry, db: Session):
+    return import_lines(
+        columnar_lines(entry.columns, entry.colIndex, entry.rowIndex),
+        entry.force_upload,
+        entry.mode,
+        entry.report_format,
+        db,
+        entry.import_id,
+    )
+
+
+@traced()
+def upload_file(
+    file,
+    filename: str,
+    mapping: str,
+    force_upload: bool,
+    mode: ImportMode,
+    report_format: ReportFormat,
     db: Session,
+    import_id: str = None,
+):
+    try:
+        mapping = json.loads(mapping)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Mapping should be JSON"
+        )
+    unknown_fields = set(mapping) - set(possible_fields)
+    if unknown_fields:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields : {(', ').join(sorted(unknown_fields))}",
+        )
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension not in file_readers:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Only csv and xlsx files are supported",
+        )
+    try:
+        lines = read_mapped_lines(file_readers[extension](file), mapping)
+    except Exception as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not read file : {error}",
+        )
+    return import_lines(lines, force_upload, mode, report_format, db, import_id)
+
+
+@traced()
+def import_lines(
+    employees: list,
+    force_upload: bool,
+    mode: ImportMode,
+    report_format: ReportFormat,
+    db: Session,
+    import_id: str = None,
 ):
-    employees = entry.lines
     if not employees:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file "
@@ -412,14 +645,24 @@ def upload(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Missing mandatory fields : {(", ").join(mandatory_fields[field] for field in missing_mandatory_fields)}",
         )
+    progress = ImportProgress(import_id)
     try:
-        return validate_employees_data_and_upload(
+        response = validate_employees_data_and_upload(
             employees=employees,
-            force_upload=entry.force_upload,
+            force_upload=force_upload,
+            mode=mode,
+            report_format=report_format,
+            progress=progress,
             db=db,
-            background_tasks=background_tasks,
         )
+    except HTTPException:
+        progress.finish("failed", len(employees))
+        db.rollback()
+        raise
     except Exception as error:
+        progress.finish("failed", len(employees))
         db.rollback()
         add_error(str(error), db)
-        raise HTTPException(status_code=400, detail=str(error))
+        raise HTTPException(status_code=400, detail="Somthing went wrong")
+    progress.finish("done" if response.status_code == 201 else "failed", len(employees))
+    return response
@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+from app.config import settings
+
+
+class LRUCache:
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, *keys: str):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class RedisCache:
+    def __init__(self, url: str, ttl: int, namespace: str):
+        import redis
+
+        self.ttl = ttl
+        self.namespace = namespace
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str):
+        return self.client.get(f"{self.namespace}:{key}")
+
+    def set(self, key: str, value: bytes):
+        self.client.set(f"{self.namespace}:{key}", value, ex=self.ttl)
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*[f"{self.namespace}:{key}" for key in keys])
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f"{self.namespace}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_cache(namespace: str, max_size: int, ttl: int):
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(settings.REDIS_URL, ttl, namespace)
+    return LRUCache(max_size, ttl)
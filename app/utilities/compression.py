@@ -0,0 +1,163 @@
+import zlib
+from app.config import settings
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes):
+        return self.compressor.compress(data)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level: int):
+        import brotli
+
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes):
+        return self.compressor.process(data)
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        import zstandard
+
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes):
+        return self.compressor.compress(data)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+def is_available(module: str):
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+compressors = {
+    "br": (BrotliCompressor, lambda: settings.COMPRESSION_BROTLI_QUALITY),
+    "zstd": (ZstdCompressor, lambda: settings.COMPRESSION_ZSTD_LEVEL),
+    "gzip": (GzipCompressor, lambda: settings.COMPRESSION_GZIP_LEVEL),
+}
+available_encodings = [
+    encoding
+    for encoding, module in [("br", "brotli"), ("zstd", "zstandard"), ("gzip", "zlib")]
+    if is_available(module)
+]
+
+
+def parse_accept_encoding(header: str):
+    accepted = {}
+    for part in header.split(","):
+        encoding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if encoding:
+            accepted[encoding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(header: str):
+    accepted = parse_accept_encoding(header)
+    candidates = [
+        encoding
+        for encoding in settings.COMPRESSION_ENCODINGS
+        if encoding in available_encodings
+        and accepted.get(encoding, accepted.get("*", 0)) > 0
+    ]
+    if not candidates:
+        return None
+    return max(
+        candidates, key=lambda encoding: accepted.get(encoding, accepted.get("*", 0))
+    )
+
+
+def create_compressor(encoding: str):
+    compressor, level = compressors[encoding]
+    return compressor(level())
+
+
+class DecompressionLimitExceeded(Exception):
+    pass
+
+
+class GzipDecompressor:
+    def __init__(self, limit: int):
+        self.decompressor = self.create()
+        self.limit = limit
+        self.size = 0
+
+    def create(self):
+        return zlib.decompressobj(wbits=47)
+
+    def read(self, data: bytes):
+        chunk = self.decompressor.decompress(data, output_size)
+        if self.decompressor.eof:
+            return chunk, b""
+        return chunk, self.decompressor.unconsumed_tail
+
+    def decompress(self, data: bytes):
+        output = []
+        while True:
+            chunk, data = self.read(data)
+            self.size += len(chunk)
+            if self.size > self.limit:
+                raise DecompressionLimitExceeded()
+            output.append(chunk)
+            if self.decompressor.eof:
+                data = self.decompressor.unused_data + data
+                if not data:
+                    break
+                self.decompressor = self.create()
+            elif not data and len(chunk) < output_size:
+                break
+        return b"".join(output)
+
+    def finish(self):
+        if not self.decompressor.eof:
+            raise ValueError("Incomplete compressed stream")
+
+
+class ZstdDecompressor(GzipDecompressor):
+    def create(self):
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    def read(self, data: bytes):
+        chunk = self.decompressor.decompress(data[:zstd_input_size])
+        return chunk, data[zstd_input_size:]
+
+
+output_size = 64 * 1024
+zstd_input_size = 64
+decompressors = {
+    encoding: decompressor
+    for encoding, decompressor, module in [
+        ("gzip", GzipDecompressor, "zlib"),
+        ("zstd", ZstdDecompressor, "zstandard"),
+    ]
+    if is_available(module)
+}
+
+
+def create_decompressor(encoding: str, limit: int):
+    return decompressors[encoding](limit)
@@ -0,0 +1,95 @@
+import logging
+import select
+import threading
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SQLALCHEMY_DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+EPOCH = "*"
+MAX_PAYLOAD_SIZE = 7900
+
+
+def format_id_ranges(ids):
+    ranges = []
+    for id in sorted(set(ids)):
+        if ranges and ranges[-1][1] == id - 1:
+            ranges[-1][1] = id
+        else:
+            ranges.append([id, id])
+    return [str(start) if start == end else f"{start}-{end}" for start, end in ranges]
+
+
+def parse_id_ranges(payload: str):
+    ids = set()
+    for part in payload.split(","):
+        start, _, end = part.partition("-")
+        ids.update(range(int(start), int(end or start) + 1))
+    return ids
+
+
+def build_payloads(ids):
+    if len(ids) > settings.CACHE_NOTIFY_MAX_IDS:
+        return [EPOCH]
+    payloads = []
+    current = ""
+    for part in format_id_ranges(ids):
+        if current and len(current) + len(part) + 1 > MAX_PAYLOAD_SIZE:
+            payloads.append(current)
+            current = ""
+        current = f"{current},{part}" if current else part
+    if current:
+        payloads.append(current)
+    return payloads
+
+
+def notify(db: Session, channel: str, ids):
+    for payload in build_payloads(ids):
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": channel, "payload": payload},
+        )
+
+
+class InvalidationListener:
+    def __init__(self, channel: str, handler):
+        self.channel = channel
+        self.handler = handler
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join(timeout=5)
+
+    def run(self):
+        while not self.stopped.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(SQLALCHEMY_DATABASE_URL)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                # anything sent while we were not listening is lost
+                self.handler(EPOCH)
+                while not self.stopped.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.handler(conn.notifies.pop(0).payload)
+            except Exception as error:
+                logger.warning(
+                    "Invalidation listener on %s failed: %s", self.channel, error
+                )
+                self.stopped.wait(5)
+            finally:
+                if conn is not None:
+                    conn.close()
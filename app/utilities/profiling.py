@@ -0,0 +1,143 @@
+import asyncio
+import cProfile
+import functools
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from app.config import settings
+
+current_capture = ContextVar("current_capture", default=None)
+
+
+def create_profiler():
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        return cProfile.Profile()
+    return Profiler()
+
+
+class Capture:
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started_on = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.duration = None
+        self.status_code = None
+        self.statements = []
+        self.profiler = None
+        self.profile_format = None
+
+    def add_statement(self, statement: str, duration: float, executemany: bool):
+        self.statements.append(
+            {
+                "statement": statement,
+                "duration_ms": round(duration * 1000, 3),
+                "executemany": executemany,
+            }
+        )
+
+    @contextmanager
+    def profile(self):
+        profiler = create_profiler()
+        self.profile_format = (
+            "prof" if isinstance(profiler, cProfile.Profile) else "html"
+        )
+        if self.profile_format == "prof":
+            profiler.enable()
+        else:
+            profiler.start()
+        try:
+            yield
+        finally:
+            if self.profile_format == "prof":
+                profiler.disable()
+            else:
+                profiler.stop()
+            self.profiler = profiler
+
+    def finish(self, status_code: int):
+        self.duration = time.perf_counter() - self.start
+        self.status_code = status_code
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_on": self.started_on.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "status_code": self.status_code,
+            "sql_count": len(self.statements),
+            "sql_duration_ms": round(
+                sum(statement["duration_ms"] for statement in self.statements), 3
+            ),
+            "profile_format": self.profile_format,
+        }
+
+    def save(self):
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILING_DIR, self.id)
+        if self.profile_format == "html":
+            with open(f"{path}.html", "w", encoding="utf-8") as file:
+                file.write(self.profiler.output_html())
+        elif self.profile_format == "prof":
+            self.profiler.dump_stats(f"{path}.prof")
+        with open(f"{path}.json", "w", encoding="utf-8") as file:
+            json.dump({**self.to_dict(), "statements": self.statements}, file)
+        prune_captures()
+
+
+def prune_captures():
+    captures = sorted(
+        (entry for entry in os.scandir(settings.PROFILING_DIR) if entry.is_file()),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    ids = list(dict.fromkeys(entry.name.split(".")[0] for entry in captures))
+    for id in ids[: max(len(ids) - settings.PROFILING_MAX_CAPTURES, 0)]:
+        for extension in ["json", "html", "prof"]:
+            path = os.path.join(settings.PROFILING_DIR, f"{id}.{extension}")
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_capture.get() is not None:
+        conn.info.setdefault("profiling_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    capture = current_capture.get()
+    if capture is not None and conn.info.get("profiling_start"):
+        duration = time.perf_counter() - conn.info["profiling_start"].pop()
+        capture.add_statement(statement, duration, executemany)
+
+
+def profile_endpoint(call):
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        capture = current_capture.get()
+        if capture is None:
+            return call(*args, **kwargs)
+        with capture.profile():
+            return call(*args, **kwargs)
+
+    return wrapper
+
+
+def instrument(app, engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not asyncio.iscoroutinefunction(
+            route.dependant.call
+        ):
+            route.dependant.call = profile_endpoint(route.dependant.call)
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import time
+from datetime import timedelta
+from sqlalchemy import delete, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+
+FINAL_STAGES = ("done", "failed")
+STATE_TTL = 600
+FINAL_STATE_TTL = 60
+
+
+def is_expired():
+    return or_(
+        models.ImportState.updated_on < func.now() - timedelta(seconds=STATE_TTL),
+        models.ImportState.stage.in_(FINAL_STAGES)
+        & (
+            models.ImportState.updated_on
+            < func.now() - timedelta(seconds=FINAL_STATE_TTL)
+        ),
+    )
+
+
+class ImportProgress:
+    def __init__(self, import_id: str | None):
+        self.import_id = import_id
+        self.last_emit = 0.0
+
+    def update(self, stage: str, done: int = 0, total: int = 0, force: bool = False):
+        if self.import_id is None:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_emit < settings.UPLOAD_PROGRESS_INTERVAL:
+            return
+        self.last_emit = now
+        values = {"stage": stage, "done": done, "total": total}
+        statement = pg_insert(models.ImportState).values(
+            import_id=self.import_id, version=1, **values
+        )
+        # runs in its own transaction so other workers see it before the import commits
+        with SessionLocal() as db:
+            db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[models.ImportState.import_id],
+                    set_={
+                        **values,
+                        "version": models.ImportState.version + 1,
+                        "updated_on": func.now(),
+                    },
+                )
+            )
+            if stage in FINAL_STAGES:
+                db.execute(delete(models.ImportState).where(is_expired()))
+            db.commit()
+
+    def finish(self, stage: str, total: int = 0):
+        self.update(stage, total, total, force=True)
+
+
+def get_state(import_id: str):
+    with SessionLocal() as db:
+        return (
+            db.query(
+                models.ImportState.version,
+                models.ImportState.stage,
+                models.ImportState.done,
+                models.ImportState.total,
+            )
+            .filter(models.ImportState.import_id == import_id, ~is_expired())
+            .first()
+        )
+
+
+async def stream_progress(import_id: str, timeout: float = 60):
+    version = 0
+    waited = 0.0
+    while True:
+        state = await asyncio.to_thread(get_state, import_id)
+        if state is not None and state.version != version:
+            version = state.version
+            event = {"stage": state.stage, "done": state.done, "total": state.total}
+            yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+            if state.stage in FINAL_STAGES:
+                return
+        elif state is None:
+            waited += settings.UPLOAD_PROGRESS_INTERVAL
+            if waited > timeout:
+                yield 'event: timeout\ndata: {"stage": "unknown"}\n\n'
+                return
+        await asyncio.sleep(settings.UPLOAD_PROGRESS_INTERVAL)
@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+current_counter = ContextVar("current_counter", default=None)
+route_metrics = {}
+route_metrics_lock = threading.Lock()
+recorders = []
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def add(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int):
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+    def server_timing(self):
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_counter.get() is not None:
+        conn.info.setdefault("query_counter_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = current_counter.get()
+    if counter is not None and conn.info.get("query_counter_start"):
+        duration = time.perf_counter() - conn.info["query_counter_start"].pop()
+        counter.add(statement, duration)
+
+
+def instrument(engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def record(route: str, counter: QueryCounter):
+    repeated = counter.repeated(settings.SQL_REPEAT_THRESHOLD)
+    for statement, count in repeated:
+        logger.warning(
+            "%s ran the same statement %d times: %s",
+            route,
+            count,
+            " ".join(statement.split())[:300],
+        )
+    with route_metrics_lock:
+        metrics = route_metrics.setdefault(
+            route,
+            {
+                "requests": 0,
+                "statements": 0,
+                "db_ms": 0.0,
+                "max_statements": 0,
+                "repeated_requests": 0,
+            },
+        )
+        metrics["requests"] += 1
+        metrics["statements"] += counter.count
+        metrics["db_ms"] += counter.duration * 1000
+        metrics["max_statements"] = max(metrics["max_statements"], counter.count)
+        metrics["repeated_requests"] += bool(repeated)
+    for recorder in recorders:
+        recorder((route, counter))
+
+
+def get_route_metrics():
+    with route_metrics_lock:
+        return {
+            route: {
+                **metrics,
+                "db_ms": round(metrics["db_ms"], 3),
+                "avg_statements": round(metrics["statements"] / metrics["requests"], 2),
+            }
+            for route, metrics in route_metrics.items()
+        }
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    counters = []
+    recorders.append(counters.append)
+    try:
+        yield counters
+    finally:
+        recorders.remove(counters.append)
+    over_limit = [
+        f"{route} ran {counter.count} queries"
+        for route, counter in counters
+        if counter.count > limit
+    ]
+    if over_limit:
+        raise AssertionError(f"Expected at most {limit} queries : {over_limit}")
@@ -4,6 +4,7 @@ from starlette.responses import JSONResponse
 from ..config import settings
 from pathlib import Path
 from app import schemas
+from app.utilities.tracing import current_span, traced
 
 conf = ConnectionConfig(
     MAIL_USERNAME=settings.MAIL_USERNAME,
@@ -19,6 +20,7 @@ conf = ConnectionConfig(
 )
 
 
+@traced("send_mail", root=True)
 async def send_mail(mail_data: schemas.MailData) -> JSONResponse:
 
     message = MessageSchema(
@@ -28,6 +30,11 @@ async def send_mail(mail_data: schemas.MailData) -> JSONResponse:
         subtype=MessageType.html,
     )
 
+    span = current_span.get()
+    if span is not None:
+        span.set_attribute("mail.template", mail_data.template)
+        span.set_attribute("mail.recipients", len(mail_data.emails))
+
     fm = FastMail(conf)
     await fm.send_message(message, template_name=mail_data.model_dump().get("template"))
     return JSONResponse(status_code=200, content={"message": "email has been sent"})
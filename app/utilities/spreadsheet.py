@@ -0,0 +1,103 @@
+import csv
+import io
+from collections.abc import Mapping
+from datetime import date, datetime
+from typing import NamedTuple
+
+
+class RawCell(NamedTuple):
+    colIndex: int
+    rowIndex: int
+    value: str
+
+
+class ColumnarRow(Mapping):
+    __slots__ = ("columns", "col_indexes", "row_indexes", "index")
+
+    def __init__(self, columns: dict, col_indexes: dict, row_indexes: list, index):
+        self.columns = columns
+        self.col_indexes = col_indexes
+        self.row_indexes = row_indexes
+        self.index = index
+
+    def __getitem__(self, field: str):
+        return RawCell(
+            self.col_indexes[field],
+            self.row_indexes[self.index],
+            self.columns[field][self.index],
+        )
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+
+def columnar_lines(columns: dict, col_indexes: dict, row_indexes: list):
+    col_indexes = {
+        field: col_indexes.get(field, position)
+        for position, field in enumerate(columns)
+    }
+    return [
+        ColumnarRow(columns, col_indexes, row_indexes, index)
+        for index in range(len(row_indexes))
+    ]
+
+
+def cell_to_str(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_csv_rows(file):
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(text, dialect)
+
+
+def iter_xlsx_rows(file):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield [cell_to_str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def read_mapped_lines(rows, mapping: dict):
+    rows = iter(rows)
+    header = [value.strip() for value in next(rows, [])]
+    columns = {}
+    for field, column in mapping.items():
+        if isinstance(column, int):
+            columns[field] = column
+        elif column.strip() in header:
+            columns[field] = header.index(column.strip())
+        else:
+            raise ValueError(f"Column {column} not found in file")
+    lines = []
+    for row_index, row in enumerate(rows, start=1):
+        if not any(value.strip() for value in row):
+            continue
+        lines.append(
+            {
+                field: RawCell(index, row_index, row[index] if index < len(row) else "")
+                for field, index in columns.items()
+            }
+        )
+    return lines
@@ -0,0 +1,285 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+import httpx
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+current_span = ContextVar("current_span", default=None)
+span_queue = queue.Queue(maxsize=settings.TRACING_QUEUE_SIZE)
+dropped_spans = 0
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, **attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = time.time_ns()
+        self.end = None
+        self.error = None
+        self.kind = 1
+
+    def child(self, name: str, **attributes):
+        return Span(name, self.trace_id, self.span_id, **attributes)
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def finish(self, error: BaseException = None):
+        global dropped_spans
+        self.end = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        try:
+            span_queue.put_nowait(self)
+        except queue.Full:
+            dropped_spans += 1
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": [
+                {"key": key, "value": to_otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {},
+        }
+        if self.parent_id is not None:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def to_otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans):
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {
+                            "key": "service.name",
+                            "value": {"stringValue": settings.TRACING_SERVICE_NAME},
+                        }
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def parse_traceparent(header: str):
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def is_sampled(trace_id: str):
+    return int(trace_id[16:], 16) < settings.TRACING_SAMPLE_RATE * 2**64
+
+
+def start_trace(name: str, traceparent: str = None, **attributes):
+    parent = parse_traceparent(traceparent) if traceparent else None
+    if parent is None:
+        trace_id = f"{random.getrandbits(128):032x}"
+        if not is_sampled(trace_id):
+            return None
+        return Span(name, trace_id, **attributes)
+    trace_id, parent_id, sampled = parent
+    if not sampled:
+        return None
+    return Span(name, trace_id, parent_id, **attributes)
+
+
+@contextmanager
+def start_span(name: str, root: bool = False, **attributes):
+    parent = current_span.get()
+    if parent is not None:
+        span = parent.child(name, **attributes)
+    elif root and settings.TRACING_ENABLED:
+        span = start_trace(name, **attributes)
+    else:
+        span = None
+    if span is None:
+        yield None
+        return
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as error:
+        span.finish(error)
+        raise
+    else:
+        span.finish()
+    finally:
+        current_span.reset(token)
+
+
+def traced(name: str = None, root: bool = False):
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if current_span.get() is None and not root:
+                    return await func(*args, **kwargs)
+                with start_span(span_name, root=root):
+                    return await func(*args, **kwargs)
+
+        else:
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if current_span.get() is None and not root:
+                    return func(*args, **kwargs)
+                with start_span(span_name, root=root):
+                    return func(*args, **kwargs)
+
+        wrapper.__traced__ = True
+        return wrapper
+
+    return decorator
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = current_span.get()
+    if parent is not None:
+        span = parent.child(
+            statement.split(None, 1)[0].upper() if statement else "SQL",
+            **{
+                "db.system": "postgresql",
+                "db.statement": " ".join(statement.split())[:1000],
+                "db.executemany": executemany,
+            },
+        )
+        span.kind = 3
+        conn.info.setdefault("tracing_spans", []).append(span)
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if conn.info.get("tracing_spans"):
+        span = conn.info["tracing_spans"].pop()
+        if cursor.rowcount >= 0:
+            span.set_attribute("db.rowcount", cursor.rowcount)
+        span.finish()
+
+
+def handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("tracing_spans"):
+        conn.info["tracing_spans"].pop().finish(exception_context.original_exception)
+
+
+def instrument(app, engine):
+    if not event.contains(engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(engine, "handle_error", handle_error)
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not getattr(
+            route.dependant.call, "__traced__", False
+        ):
+            route.dependant.call = traced(f"handler {route.name}")(route.dependant.call)
+
+
+class FileExporter:
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as file:
+            file.write(json.dumps(to_otlp(spans)) + "\n")
+
+
+class OTLPExporter:
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.client = httpx.Client(timeout=5)
+
+    def export(self, spans):
+        self.client.post(self.endpoint, json=to_otlp(spans)).raise_for_status()
+
+
+def create_exporter():
+    if settings.TRACING_EXPORTER == "otlp":
+        return OTLPExporter(settings.TRACING_OTLP_ENDPOINT)
+    return FileExporter(settings.TRACING_FILE)
+
+
+class SpanProcessor:
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join(timeout=5)
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.stopped.wait(settings.TRACING_EXPORT_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        global dropped_spans
+        spans = []
+        while True:
+            try:
+                spans.append(span_queue.get_nowait())
+            except queue.Empty:
+                break
+        for start in range(0, len(spans), settings.TRACING_BATCH_SIZE):
+            try:
+                self.exporter.export(spans[start : start + settings.TRACING_BATCH_SIZE])
+            except Exception as error:
+                logger.warning("Span export failed: %s", error)
+        if dropped_spans:
+            logger.warning("%d spans dropped, the span queue was full", dropped_spans)
+            dropped_spans = 0
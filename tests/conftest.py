@@ -0,0 +1,56 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.commands.check_query_plans import (
+    get_sample,
+    seed,
+    seed_password,
+    vacuum,
+)
+from app.config import settings
+from app.database import engine, get_db
+from app.main import app
+from app.OAuth2 import hash_password, security_version_cache
+from app.services import employee
+from app.utilities.query_counter import assert_max_queries
+
+
+@pytest.fixture(scope="session")
+def seeded_connection():
+    engine.echo = False
+    vacuum()
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        seed(connection, settings.QUERY_PLAN_SEED_SIZE, hash_password(seed_password))
+        yield connection
+        transaction.rollback()
+
+
+@pytest.fixture(scope="session")
+def sample(seeded_connection):
+    return get_sample(seeded_connection, seed_password)
+
+
+@pytest.fixture
+def db(seeded_connection):
+    employee.employee_cache.clear()
+    employee.count_cache.clear()
+    security_version_cache.clear()
+    savepoint = seeded_connection.begin_nested()
+    with Session(
+        bind=seeded_connection, join_transaction_mode="create_savepoint"
+    ) as session:
+        yield session
+    savepoint.rollback()
+
+
+@pytest.fixture
+def client(db):
+    app.dependency_overrides[get_db] = lambda: db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def max_queries():
+    return assert_max_queries
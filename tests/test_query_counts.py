@@ -0,0 +1,21 @@
+import pytest
+from app import models
+from app.OAuth2 import create_employee_token
+
+
+@pytest.fixture
+def headers(db, sample):
+    emp = db.get(models.Employee, sample["employee"].id)
+    return {"Authorization": f"Bearer {create_employee_token(emp)}"}
+
+
+def test_list_employees(client, headers, max_queries):
+    with max_queries(3):
+        response = client.get("/employee/", headers=headers)
+    assert response.status_code == 200
+
+
+def test_get_employee(client, headers, sample, max_queries):
+    with max_queries(2):
+        response = client.get(f"/employee/{sample['employee'].id}", headers=headers)
+    assert response.status_code == 200
@@ -0,0 +1,13 @@
+import pytest
+from app.commands.check_query_plans import run_isolated, scenarios
+from app.config import settings
+
+
+@pytest.mark.parametrize(
+    "scenario", scenarios, ids=lambda scenario: scenario.name.replace(" ", "_")
+)
+def test_query_plan(seeded_connection, sample, scenario):
+    problems = run_isolated(
+        seeded_connection, scenario, sample, settings.QUERY_PLAN_COST_BUDGET
+    )
+    assert not problems, "\n".join(problems)